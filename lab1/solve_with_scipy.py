@@ -5,29 +5,21 @@ import numpy as np
 from scipy.optimize import linprog
 
 from src.lp_reader import read_lp_file
+from src.models import LinearProblem, Solution
 
 
-def build_scipy_matrices() -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, list[Tuple[float | None, float | None]], bool]:
-    base_dir = os.path.dirname(__file__)
-    input_path = os.path.join(base_dir, 'examples', 'lp_input_example.txt')
-    lp = read_lp_file(input_path)
+def build_scipy_matrices(lp: LinearProblem) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, list[Tuple[float | None, float | None]], bool]:
+    # разбиение ограничений по знакам булевыми масками (порядок строк сохраняется)
+    signs = np.asarray(lp.signs, dtype=str)
+    ub = (signs == '<=') | (signs == '>=')
+    eq = ~ub
 
-    # SciPy решает задачу минимизации: min c^T x
-    c = np.array(lp.objective, dtype=float)
-    if lp.is_max:
-        c = -c
-
-    A_ub, b_ub, A_eq, b_eq = [], [], [], []
-    for row, sign, rhs in zip(lp.constraints, lp.signs, lp.rhs):
-        if sign == '<=':
-            A_ub.append(row)
-            b_ub.append(rhs)
-        elif sign == '>=':
-            A_ub.append([-v for v in row])
-            b_ub.append(-rhs)
-        else:
-            A_eq.append(row)
-            b_eq.append(rhs)
+    # '>=' приводим к '<=' сменой знака строки
+    flip = np.where(signs[ub] == '>=', -1.0, 1.0)
+    A_ub = lp.constraints[ub] * flip[:, None]
+    b_ub = lp.rhs[ub] * flip
+    A_eq = lp.constraints[eq]
+    b_eq = lp.rhs[eq]
 
     bounds = []
     for s in lp.var_signs[:lp.n_original_vars]:
@@ -37,40 +29,52 @@ def build_scipy_matrices() -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarr
             bounds.append((None, 0))
 
     return (
-        np.array(A_ub, dtype=float) if A_ub else None,
-        np.array(b_ub, dtype=float) if b_ub else None,
-        np.array(A_eq, dtype=float) if A_eq else None,
-        np.array(b_eq, dtype=float) if b_eq else None,
+        A_ub if ub.any() else None,
+        b_ub if ub.any() else None,
+        A_eq if eq.any() else None,
+        b_eq if eq.any() else None,
         bounds,
         lp.is_max,
     )
 
 
+def solve_with_highs(lp: LinearProblem) -> Solution:
+    '''
+    Решает ЗЛП при помощи scipy.optimize.linprog (решатель HiGHS).
+    Знаки ограничений и переменных учитываются напрямую, без приведения к каноническому виду.
+
+    :param lp: исходная задача
+    :return: объект Solution
+    '''
+    A_ub, b_ub, A_eq, b_eq, bounds, is_max = build_scipy_matrices(lp)
+
+    # SciPy решает задачу минимизации: min c^T x
+    c = -lp.objective if is_max else lp.objective
+
+    res = linprog(c, A_ub=A_ub, b_ub=b_ub, A_eq=A_eq, b_eq=b_eq, bounds=bounds, method='highs')
+    if not res.success:
+        return Solution([], float('nan'), False, str(res.message))
+
+    val = float(res.fun)
+    return Solution(res.x.tolist(), -val if is_max else val, True, str(res.message))
+
+
 def main() -> None:
-    A_ub, b_ub, A_eq, b_eq, bounds, is_max = build_scipy_matrices()
     base_dir = os.path.dirname(__file__)
     input_path = os.path.join(base_dir, 'examples', 'lp_input_example.txt')
     lp = read_lp_file(input_path)
 
-    c = np.array(lp.objective, dtype=float)
-    if is_max:
-        c = -c
-
-    res = linprog(c, A_ub=A_ub, b_ub=b_ub, A_eq=A_eq, b_eq=b_eq, bounds=bounds, method='highs')
+    solution = solve_with_highs(lp)
     output_path = os.path.join(base_dir, 'examples', 'lp_solution_scipy.txt')
     with open(output_path, 'w', encoding='utf-8') as f:
-        if not res.success:
+        if not solution.found:
             f.write('Решение не найдено.\n')
-            f.write(str(res.message))
+            f.write(solution.reason)
             return
-        x = res.x
         f.write('Оптимальные значения исходных переменных (SciPy):\n')
-        for name, val in zip(lp.var_names[:lp.n_original_vars], x[:lp.n_original_vars]):
+        for name, val in zip(lp.var_names[:lp.n_original_vars], solution.point[:lp.n_original_vars]):
             f.write(f'  {name}: {val}\n')
-        val = float(res.fun)
-        if is_max:
-            val = -val
-        f.write('Значение целевой функции (SciPy): ' + str(val) + '\n')
+        f.write('Значение целевой функции (SciPy): ' + str(solution.value) + '\n')
 
 
 if __name__ == '__main__':
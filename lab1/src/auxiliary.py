@@ -1,3 +1,4 @@
+import numpy as np
 from src.models import LinearProblem
 
 
@@ -9,48 +10,37 @@ def build_auxiliary(lp: LinearProblem) -> LinearProblem:
     - Целевая функция: минимизировать сумму искусственных переменных.
     """
 
-    # копируем исходные данные, чтобы не менять оригинал
-    constraints = [row[:] for row in lp.constraints]
-    rhs = lp.rhs[:]
     var_names = lp.var_names[:]
     var_signs = lp.var_signs[:]
 
-    artificial_vars = []
+    n_constraints = lp.m
+    n_vars = lp.n
 
-    # сначала нормализуем строки, чтобы у всех одинаковая длина
-    n_constraints = len(rhs)
-    n_vars = len(constraints[0])
-
-    # добавляем искусственные переменные
-    for i in range(n_constraints):
-        b = rhs[i]
-        if b < 0:
-            # меняем знак у строки и свободного члена
-            constraints[i] = [-x for x in constraints[i]]
-            rhs[i] = -b
-
-    # добавляем искусственные переменные
-    for i in range(n_constraints):
-        for j in range(n_constraints):
-            constraints[j].append(1 if i == j else 0)
-        artificial_vars.append(f"a{i+1}")
+    # матрица вспомогательной задачи выделяется один раз и заполняется за один проход:
+    # исходный блок сразу пишется с нужным знаком строки (строки с отрицательной
+    # правой частью меняют знак), затем единичный блок искусственных переменных
+    neg = lp.rhs < 0
+    A_aux = np.zeros((n_constraints, n_vars + n_constraints))
+    np.multiply(lp.constraints, np.where(neg, -1.0, 1.0)[:, None], out=A_aux[:, :n_vars])
+    A_aux[np.arange(n_constraints), n_vars + np.arange(n_constraints)] = 1.0
+    b = np.where(neg, -lp.rhs, lp.rhs)
+    artificial_vars = [f"a{i+1}" for i in range(n_constraints)]
 
     # целевая функция: минимизировать сумму искусственных переменных
     # исходные коэффициенты = 0, коэффициенты при искусственных = 1
-    objective = [0] * (n_vars + len(artificial_vars))
-    for i in range(len(artificial_vars)):
-        objective[n_vars + i] = 1
+    objective = np.concatenate([np.zeros(n_vars), np.ones(n_constraints)])
 
     var_names += artificial_vars
     var_signs += [1] * len(artificial_vars)
 
     return LinearProblem(
         objective=objective,
-        constraints=constraints,
-        rhs=rhs,
-        signs=['='] * len(rhs),
+        constraints=A_aux,
+        rhs=b,
+        signs=['='] * n_constraints,
         var_names=var_names,
         is_max=False,
         var_signs=var_signs,
         n_original_vars=lp.n_original_vars,
+        dtype=lp.dtype,
     )
@@ -1,3 +1,4 @@
+import numpy as np
 from src.models import LinearProblem
 
 
@@ -9,54 +10,42 @@ def to_canonical(lp: LinearProblem) -> LinearProblem:
     - добавляет дополнительные переменные (если потребуется)
     '''
 
-    canonical_constraits = []
-    canonical_rhs = []
-    canonical_signs = []
-
     # Шаг 0: учтём знаки переменных, чтобы перейти к неотрицательным переменным
     base_var_count = len(lp.var_names)
-    transformed_constraints = []
-    for row in lp.constraints:
-        transformed_row = [row[j] * (lp.var_signs[j] if j < base_var_count else 1) for j in range(base_var_count)]
-        transformed_constraints.append(transformed_row)
-    transformed_objective = [lp.objective[j] * (lp.var_signs[j] if j < base_var_count else 1) for j in range(base_var_count)]
-
-    # Сначала подсчитаем, сколько slack переменных понадобится
-    num_slack_vars = sum(1 for sign in lp.signs if sign != '=')
-
-    slack_count = 0
-
-    for row, sign, r in zip(transformed_constraints, lp.signs, lp.rhs):
-        extra_vars = [0] * num_slack_vars  # вектор для дополнительных переменных
-        if sign == '<=':
-            extra_vars[slack_count] = 1
-            slack_count += 1
-        elif sign == '>=':
-            extra_vars[slack_count] = -1
-            slack_count += 1
-
-        # объединяем основное ограничение с добавочными переменными
-        row_canon = row + extra_vars
-        canonical_constraits.append(row_canon)
-        canonical_rhs.append(r)
-        canonical_signs.append('=')
+    var_signs = np.asarray(lp.var_signs[:base_var_count], dtype=np.float64)
+
+    # Строки с неравенствами получают по одной добавочной переменной:
+    # is_slack - маска таких строк, slack_col - номер добавочного столбца строки,
+    # slack_sign - коэффициент при ней (+1 для '<=', -1 для '>=', 0 для '=')
+    signs_arr = np.asarray(lp.signs)
+    is_slack = signs_arr != '='
+    num_slack_vars = int(is_slack.sum())
+    slack_col = base_var_count + np.cumsum(is_slack) - 1
+    slack_sign = np.where(signs_arr == '<=', 1.0, np.where(signs_arr == '>=', -1.0, 0.0))
+
+    # Матрица ограничений выделяется один раз: исходный блок + блок добавочных переменных
+    m = lp.m
+    canonical_constraints = np.zeros((m, base_var_count + num_slack_vars), dtype=np.float64)
+    np.multiply(lp.constraints, var_signs, out=canonical_constraints[:, :base_var_count])
+    canonical_constraints[is_slack, slack_col[is_slack]] = slack_sign[is_slack]
 
     # новые имена переменных: исходные + добавочные (s1, ...)
     var_names = lp.var_names + [f's{i + 1}' for i in range(num_slack_vars)]
 
     # Целевая функция тоже должна быть расширена нулями для новых переменных
-    extended_obj = transformed_objective + [0] * num_slack_vars
+    extended_obj = np.concatenate([lp.objective * var_signs, np.zeros(num_slack_vars)])
 
     # Все переменные теперь неотрицательные; добавочные тоже неотрицательные
     new_var_signs = [1] * len(var_names)
 
     return LinearProblem(
         extended_obj,
-        canonical_constraits,
-        canonical_rhs,
-        canonical_signs,
+        canonical_constraints,
+        lp.rhs,
+        ['='] * m,
         var_names,
         lp.is_max,
         var_signs=new_var_signs,
         n_original_vars=lp.n_original_vars,
+        dtype=lp.dtype,
     )
@@ -1,7 +1,38 @@
-from typing import List
 import re
+from pathlib import Path
+
+import numpy as np
 from src.models import LinearProblem
 
+# шаблоны компилируются один раз при импорте модуля
+# признаки знаков переменных: "x1 > 0", "x2 <= 0"
+_BOUNDS_RE = re.compile(r"x(\d+)\s*([<>]=?)\s*0")
+# ограничение: левая часть, знак, правая часть
+_CONSTR_RE = re.compile(r"^(.*?)(<=|>=|=)(.*)$")
+# индекс переменной: "x12" -> 12
+_VAR_RE = re.compile(r"x(\d+)")
+# слагаемое вида "2.5x3", "- 2*x3", "-x3": знак, коэффициент (может отсутствовать) и индекс переменной;
+# альтернативы коэффициента не пересекаются по первому символу, поэтому сопоставление
+# идёт за один проход без возвратов
+_TERM_RE = re.compile(r"([+-]?)\s*(\d+(?:\.\d*)?|\.\d+)?\s*\*?\s*x(\d+)")
+
+
+def _fill_terms(expr: str, out: np.ndarray) -> None:
+    '''
+    Записывает коэффициенты слагаемых выражения в массив out (x1 -> out[0], x2 -> out[1], ...)
+
+    :param expr: линейное выражение, например "1x1 - 2.5x3"
+    :param out: массив коэффициентов, заполненный нулями
+    '''
+    # findall отдаёт готовые кортежи строк (без объектов Match), а запись в массив
+    # выполняется одним присваиванием по списку индексов
+    terms = _TERM_RE.findall(expr)
+    if not terms:
+        return
+    indices = [int(index) - 1 for _, _, index in terms]
+    values = [(float(coeff) if coeff else 1.0) * (-1.0 if sign == '-' else 1.0) for sign, coeff, _ in terms]
+    out[indices] = values
+
 
 def read_lp_file(filename: str) -> LinearProblem:
     '''
@@ -16,96 +47,52 @@ def read_lp_file(filename: str) -> LinearProblem:
     :param filename: путь к файлу
     :return: объект LinearProblem
     '''
-    with open(filename, 'r', encoding='utf-8') as file:
-        lines = [line.strip() for line in file if line.strip()]
+    # файл читается целиком и делится на строки одним вызовом
+    text = Path(filename).read_text(encoding='utf-8')
+    lines = [line for line in map(str.strip, text.splitlines()) if line]
 
     # определяем тип задачи (максимизация/миниманизация)
     is_max = lines[0].lower().startswith('max')
 
     # целевая функция Z
     objective_str = lines[1].split('=')[1].strip()
-    obj_coeffs: List[float] = []
-
-    for part in objective_str.replace('-', '+-').split('+'):
-        part = part.strip()
-        if not part or not part.strip():
-            continue
-        if 'x' in part:
-            parts = part.split('x')
-            coeff = float(parts[0])
-            var_index = int(parts[1]) - 1  # x1 -> index 0, x2 -> index 1, etc.
-            # расширяем obj_coeffs до нужного размера
-            while len(obj_coeffs) <= var_index:
-                obj_coeffs.append(0.0)
-            obj_coeffs[var_index] = coeff
+    n_obj_vars = max((int(i) for i in _VAR_RE.findall(objective_str)), default=0)
 
     # читаем строку с признаками знаков переменных, если присутствует
-    var_signs: List[int] = []  # +1 для x>=0, -1 для x<=0
+    bounds_patterns = []
     start_idx = 2
     if len(lines) > 2:
-        bounds_line = lines[2]
         # ищем шаблоны вида "x1 > 0", "x2 < 0"
-        bounds_patterns = re.findall(r"x(\d+)\s*([<>]=?)\s*0", bounds_line)
+        bounds_patterns = _BOUNDS_RE.findall(lines[2])
         if bounds_patterns:
-            # определяем максимальный индекс переменной
-            max_index = 0
-            for idx_str, _ in bounds_patterns:
-                max_index = max(max_index, int(idx_str))
-            var_signs = [1] * max(max_index, len(obj_coeffs))
-            for idx_str, op in bounds_patterns:
-                i = int(idx_str) - 1
-                # >0 или >=0 => +1, <0 или <=0 => -1
-                var_signs[i] = 1 if '>' in op else -1
             start_idx = 3
 
-    # ограничения
-    constraints, rhs, signs = [], [], []
+    # ограничения: (левая часть, знак, правая часть)
+    parsed = [match.groups() for match in map(_CONSTR_RE.match, lines[start_idx:]) if match is not None]
 
-    for line in lines[start_idx:]:
-        if any(sign in line for sign in ['<=', '>=', '=']):
-            if '<=' in line:
-                sign = '<='
-            elif '>=' in line:
-                sign = '>='
-            else:
-                sign = '='
+    # первый проход: число переменных - максимальный индекс x в целевой функции и ограничениях
+    max_vars = max([n_obj_vars] + [int(i) for left, _, _ in parsed for i in _VAR_RE.findall(left)])
 
-        left, right = line.split(sign)
-        rhs.append(float(right.strip()))
-        signs.append(sign)
+    # массивы выделяются сразу нужного размера и заполняются по индексам
+    obj_coeffs = np.zeros(max_vars)
+    _fill_terms(objective_str, obj_coeffs)
 
-        row = []
-        for part in left.replace('-', '+-').split('+'):
-            part = part.strip()
-            if not part or not part.strip():
-                continue
-            if 'x' in part:
-                parts = part.split('x')
-                coeff = float(parts[0])
-                var_index = int(parts[1]) - 1  # x1 -> index 0, x2 -> index 1, etc.
-                # расширяем row до нужного размера
-                while len(row) <= var_index:
-                    row.append(0.0)
-                row[var_index] = coeff
-        constraints.append(row)
-
-    # Убеждаемся что все строки имеют одинаковую длину
-    max_vars = max(len(obj_coeffs), max(len(row) for row in constraints) if constraints else 0)
-    # Расширяем obj_coeffs до максимального размера
-    while len(obj_coeffs) < max_vars:
-        obj_coeffs.append(0.0)
-    # Расширяем каждую строку constraints до максимального размера
-    for row in constraints:
-        while len(row) < max_vars:
-            row.append(0.0)
+    constraints = np.zeros((len(parsed), max_vars))
+    rhs = np.zeros(len(parsed))
+    signs = []
+    for i, (left, sign, right) in enumerate(parsed):
+        rhs[i] = float(right.strip())
+        signs.append(sign)
+        _fill_terms(left, constraints[i])
 
     var_names = [f"x{i+1}" for i in range(max_vars)]
-    # приведение длины var_signs к количеству переменных
-    if not var_signs:
-        var_signs = [1] * max_vars
-    else:
-        if len(var_signs) < max_vars:
-            var_signs += [1] * (max_vars - len(var_signs))
+
+    # знаки переменных (+1 для x>=0, -1 для x<=0): список сразу нужной длины
+    max_index = max((int(idx_str) for idx_str, _ in bounds_patterns), default=0)
+    var_signs = [1] * max(max_vars, max_index)
+    for idx_str, op in bounds_patterns:
+        # >0 или >=0 => +1, <0 или <=0 => -1
+        var_signs[int(idx_str) - 1] = 1 if '>' in op else -1
 
     return LinearProblem(
         obj_coeffs,
@@ -1,5 +1,7 @@
 from typing import List
 
+import numpy as np
+
 
 class LinearProblem:
     '''
@@ -8,26 +10,35 @@ class LinearProblem:
 
     def __init__(
             self,
-            objective: List[float],
-            constraints: List[List[float]],
-            rhs: List[float],
+            objective: List[float] | np.ndarray,
+            constraints: List[List[float]] | np.ndarray,
+            rhs: List[float] | np.ndarray,
             signs: List[str],
             var_names: List[str],
             is_max: bool = True,
             var_signs: List[int] | None = None,
             n_original_vars: int | None = None,
+            dtype: np.dtype | type = np.float64,
         ):
         '''
         :param objective: коэффициенты целевой функции
-        :param constraints: матрица коэффициентов ограничений
+        :param constraints: матрица коэффициентов ограничений (плотная или разреженная)
         :param rhs: правая часть ограничений (b)
         :param signs: знаки ограничений ('<=', '>=', '=')
         :param var_names: имена переменных ['x1', 'x2', ...]
         :param is_max: True если max, False если min
+        :param dtype: тип элементов симплекс-таблицы (np.float64 или np.float32);
+                      исходные данные всегда хранятся в float64
         '''
-        self.objective = objective
-        self.constraints = constraints
-        self.rhs = rhs
+        # разреженная матрица ограничений (например, scipy.sparse) переводится
+        # в плотную один раз: симплекс-таблица всё равно плотная
+        if hasattr(constraints, 'toarray'):
+            constraints = constraints.toarray()
+        # числовые данные храним в непрерывных float64-массивах, чтобы
+        # последующие этапы не копировали их заново
+        self.objective = np.ascontiguousarray(objective, dtype=np.float64)
+        self.constraints = np.ascontiguousarray(constraints, dtype=np.float64)
+        self.rhs = np.ascontiguousarray(rhs, dtype=np.float64)
         self.signs = signs
         self.var_names = var_names
         self.is_max = is_max
@@ -36,6 +47,33 @@ class LinearProblem:
         self.var_signs = var_signs if var_signs is not None else [1] * len(var_names)
         # число исходных переменных до расширений (slack/artificial)
         self.n_original_vars = n_original_vars if n_original_vars is not None else len(var_names)
+        self.dtype = np.dtype(dtype)
+
+    @property
+    def m(self) -> int:
+        '''Число ограничений'''
+        return self.constraints.shape[0]
+
+    @property
+    def n(self) -> int:
+        '''Число переменных'''
+        return self.constraints.shape[1]
+
+    def astype(self, dtype: np.dtype | type) -> 'LinearProblem':
+        '''
+        Та же задача с другим типом элементов симплекс-таблицы (данные не копируются)
+        '''
+        return LinearProblem(
+            self.objective,
+            self.constraints,
+            self.rhs,
+            self.signs,
+            self.var_names,
+            self.is_max,
+            var_signs=self.var_signs,
+            n_original_vars=self.n_original_vars,
+            dtype=dtype,
+        )
 
 
 class Solution:
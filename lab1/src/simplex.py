@@ -1,86 +1,92 @@
 import numpy as np
 from src.models import LinearProblem, Solution
+from src.simplex_numba import SMALL_M, TOLERANCE, pivot_small, pivot_generic
+
+# Допустимая относительная невязка ||Ax - b|| решения, найденного в float32
+RESIDUAL_TOL = 1e-4
 
 def solve_simplex(lp: LinearProblem):
     # Симплекс-метод только для задач максимизации в каноническом виде!
 
-    # Приводим данные к numpy-массивам
-    A = np.array(lp.constraints, dtype=float)
-    b = np.array(lp.rhs, dtype=float)
-    c = np.array(lp.objective, dtype=float)
+    # Данные задачи уже хранятся в numpy-массивах
+    A = lp.constraints
+    b = lp.rhs
+    c = lp.objective
 
-    m, n = A.shape
+    m, n = lp.m, lp.n
 
-    # Добавим slack-переменные для неравенств "<="
-    # (может потребоваться доработка с учетом "=", ">=")
-    basis = []
-    for i, sign in enumerate(lp.signs):
-        if sign == "<=":
-            new_col = np.zeros((m, 1))
-            new_col[i, 0] = 1
-            A = np.hstack((A, new_col))
-            c = np.hstack((c, [0]))
-            basis.append(n)
-            n += 1
-        elif sign == "=":
-            basis.append(None)  # изначально не базисная переменная
-        elif sign == ">=":
-            new_col = np.zeros((m, 1))
-            new_col[i, 0] = -1
-            A = np.hstack((A, new_col))
-            c = np.hstack((c, [0]))
-            basis.append(n)
-            n += 1
+    # Добавим slack-переменные для неравенств: +1 для "<=", -1 для ">=";
+    # строки "=" изначально не имеют базисной переменной
+    signs_arr = np.asarray(lp.signs)
+    is_slack = signs_arr != '='
+    num_slack = int(is_slack.sum())
+    slack_rows = np.nonzero(is_slack)[0]
+    slack_vals = np.where(signs_arr[slack_rows] == '<=', 1.0, -1.0)
+    slack_cols = n + np.arange(num_slack)
+    # Номера базисных переменных строк (-1 - базисной переменной нет)
+    basis = np.full(m, -1, dtype=np.int64)
+    basis[slack_rows] = slack_cols
 
-    # Подготовка симплекс-таблицы
-    num_vars = len(lp.objective)
-    tableau = np.zeros((m + 1, n + 1))
-    tableau[:m, :n] = A
+    # Подготовка симплекс-таблицы: выделяется один раз сразу с блоком slack-переменных;
+    # хранится по столбцам, так как ядро pivot обходит таблицу столбцами
+    num_vars = n
+    n += num_slack
+    tableau = np.zeros((m + 1, n + 1), dtype=lp.dtype, order='F')
+    tableau[:m, :num_vars] = A
+    tableau[slack_rows, slack_cols] = slack_vals
     tableau[:m, -1] = b
-    tableau[-1, :n] = -c if lp.is_max else c
+    tableau[-1, :num_vars] = -c if lp.is_max else c
 
-    # Симплекс-итерации
+    # Симплекс-итерации (одна итерация - скомпилированное ядро pivot);
+    # ядро выбирается один раз по числу ограничений
+    # Ведущий столбец выбирается по правилу Devex (веса gamma); если базис
+    # повторился (зацикливание на вырожденной задаче) - далее по правилу Бланда.
+    # Правило Бланда не зацикливается, поэтому повтор базиса после перехода
+    # к нему - ошибка (например, численная): решение не найдено
+    pivot = pivot_small if m <= SMALL_M else pivot_generic
+    tol = TOLERANCE[lp.dtype]
+    gamma = np.ones(n)
+    bland = False
+    visited = {basis.tobytes()}
     while True:
-        # Поиск ведущего столбца (самый отрицательный коэффициент в строке цели)
-        obj_row = tableau[-1, :-1]
-        if np.all(obj_row >= -1e-9):  # почти все >=0; финальный ответ
+        pivot_row, pivot_col = pivot(tableau, m, n, tol, gamma, bland, basis)
+
+        # Все коэффициенты строки цели >= 0; финальный ответ
+        if pivot_col < 0:
             break
-        pivot_col = np.argmin(obj_row)
 
         # Проверка неограниченности
-        if np.all(tableau[:m, pivot_col] <= 1e-9):
+        if pivot_row < 0:
             return Solution([], float('inf'), False, "Функция не ограничена сверху")
 
-        # Поиск ведущей строки (правило минимального отношения)
-        ratios = []
-        for i in range(m):
-            if tableau[i, pivot_col] > 1e-9:
-                ratios.append(tableau[i, -1] / tableau[i, pivot_col])
-            else:
-                ratios.append(np.inf)
-        pivot_row = np.argmin(ratios)
-
-        # Делим ведущую строку на ведущий элемент
-        tableau[pivot_row, :] /= tableau[pivot_row, pivot_col]
-
-        # Нулевые все остальные элементы в столбце
-        for i in range(m+1):
-            if i != pivot_row:
-                tableau[i, :] -= tableau[i, pivot_col] * tableau[pivot_row, :]
-
         # Обновление базиса
-        if len(basis) > pivot_row:
-            basis[pivot_row] = pivot_col
-        else:
-            basis.append(pivot_col)
+        basis[pivot_row] = pivot_col
+        key = basis.tobytes()
+        if key in visited:
+            if bland:
+                return Solution([], float('nan'), False, "Симплекс: зацикливание по правилу Бланда")
+            # при переходе к правилу Бланда посещённые базисы отсчитываются заново
+            bland = True
+            visited = set()
+        visited.add(key)
 
     # Извлечение решения
-    x = np.zeros(n)
+    x = np.zeros(n, dtype=np.float64)
     for i in range(m):
-        if basis[i] is not None and basis[i] < n:
+        if 0 <= basis[i] < n:
             x[basis[i]] = tableau[i, -1]
-    val = tableau[-1, -1]
+    val = float(tableau[-1, -1])
+
+    # Решение в пониженной точности проверяем по невязке исходной системы;
+    # при плохой обусловленности пересчитываем задачу в float64
+    if lp.dtype != np.float64:
+        r = A @ x[:num_vars] - b
+        r[slack_rows] += slack_vals * x[slack_cols]
+        residual = np.linalg.norm(r)
+        if residual > RESIDUAL_TOL * max(1.0, np.linalg.norm(b)):
+            return solve_simplex(lp.astype(np.float64))
+
     # Оставь только исходные переменные
     x = x[:num_vars]
 
-    return Solution(list(x), val if lp.is_max else -val, True, "Симплекс: решение найдено")
+    return Solution(x.tolist(), val if lp.is_max else -val, True, "Симплекс: решение найдено")
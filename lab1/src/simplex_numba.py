@@ -0,0 +1,177 @@
+import numpy as np
+from numba import njit
+
+
+# fast-math без флагов nnan/ninf: правило минимального отношения использует np.inf
+_FASTMATH = {'nsz', 'arcp', 'contract', 'afn', 'reassoc'}
+
+
+# Порог числа ограничений, до которого используется ядро pivot_small:
+# таблица целиком помещается в кэш L1, и проход без ветвлений выгоднее
+SMALL_M = 64
+
+# Ядра компилируются для float64- и float32-таблиц, хранящихся по столбцам
+# (order='F'): ведущий столбец и каждый столбец при исключении непрерывны в памяти
+_SIGNATURES = [
+    'UniTuple(int64, 2)(float64[::1, :], int64, int64, float64, float64[::1], boolean, int64[::1])',
+    'UniTuple(int64, 2)(float32[::1, :], int64, int64, float64, float64[::1], boolean, int64[::1])',
+]
+
+# Допуск сравнения с нулём для каждого типа таблицы
+TOLERANCE = {
+    np.dtype(np.float64): 1e-9,
+    np.dtype(np.float32): 1e-5,
+}
+
+
+@njit(inline='always')
+def _select_pivot(T, m, n, tol, gamma, bland, basis):
+    '''
+    Выбор ведущего элемента: столбец по правилу Devex (приближённый
+    наискорейший спуск) или по правилу Бланда, строка по правилу
+    минимального отношения (по правилу Бланда - среди равных отношений
+    строка с наименьшим номером базисной переменной).
+
+    :return: (ведущая строка, ведущий столбец);
+             (-1, -1) - план оптимален, (-1, ведущий столбец) - функция не ограничена
+    '''
+    # Поиск ведущего столбца среди столбцов с отрицательной оценкой (с допуском):
+    # Бланд - первый такой столбец, Devex - максимум d_j^2 / gamma_j.
+    # Если таких столбцов нет - план оптимален
+    pivot_col = -1
+    best = 0.0
+    for j in range(n):
+        d = T[m, j]
+        if d < -tol:
+            if bland:
+                pivot_col = j
+                break
+            score = d * d / gamma[j]
+            if score > best:
+                best = score
+                pivot_col = j
+    if pivot_col < 0:
+        return -1, -1
+
+    # Поиск ведущей строки (правило минимального отношения) за один проход:
+    # рассматриваются только строки с положительным элементом ведущего столбца;
+    # если таких нет - функция не ограничена
+    pivot_row = -1
+    min_ratio = np.inf
+    for i in range(m):
+        if T[i, pivot_col] > tol:
+            ratio = T[i, n] / T[i, pivot_col]
+            if ratio < min_ratio:
+                min_ratio = ratio
+                pivot_row = i
+
+    # Правило Бланда: среди строк с минимальным отношением (с допуском) -
+    # строка с наименьшим номером базисной переменной (-1 - базисной
+    # переменной нет, такие строки выбираются первыми)
+    if bland and pivot_row >= 0:
+        for i in range(m):
+            if (T[i, pivot_col] > tol and basis[i] < basis[pivot_row]
+                    and T[i, n] / T[i, pivot_col] <= min_ratio + tol):
+                pivot_row = i
+
+    return pivot_row, pivot_col
+
+
+@njit(inline='always')
+def _update_weights(gamma, prow, pivot_col, n):
+    '''
+    Обновление опорных весов Devex после замены базиса:
+    gamma_j = max(gamma_j, (a_rj / a_rq)^2 * gamma_q), где prow - ведущая
+    строка, уже делённая на ведущий элемент a_rq. Для выходящей из базиса
+    переменной a_rj = 1, поэтому её вес тоже обновляется этим правилом.
+    '''
+    gamma_q = gamma[pivot_col]
+    for j in range(n):
+        w = prow[j] * prow[j] * gamma_q
+        if w > gamma[j]:
+            gamma[j] = w
+
+
+# Явная сигнатура: компиляция происходит при импорте модуля, а результат
+# сохраняется в __pycache__ (cache=True), поэтому повторные запуски её не повторяют.
+# Таблица должна быть F-непрерывным массивом float64 или float32.
+@njit(_SIGNATURES, cache=True, fastmath=_FASTMATH)
+def pivot_small(T, m, n, tol, gamma, bland, basis):
+    '''
+    Одна итерация симплекс-метода для небольших таблиц (m <= SMALL_M).
+    Исключение выполняется плотным проходом по всем строкам без проверок,
+    чтобы внутренний цикл векторизовался без ветвлений.
+
+    :param T: симплекс-таблица (последняя строка - строка цели, последний столбец - b)
+    :param m: число ограничений
+    :param n: число переменных
+    :param tol: допуск сравнения с нулём (см. TOLERANCE)
+    :param gamma: опорные веса Devex (длины n, изначально единицы), обновляются на месте
+    :param bland: выбирать ведущий элемент по правилу Бланда (защита от зацикливания)
+    :param basis: номера базисных переменных строк (-1 - базисной переменной нет)
+    :return: (ведущая строка, ведущий столбец);
+             (-1, -1) - план оптимален, (-1, ведущий столбец) - функция не ограничена
+    '''
+    pivot_row, pivot_col = _select_pivot(T, m, n, tol, gamma, bland, basis)
+    if pivot_row < 0:
+        return pivot_row, pivot_col
+
+    # Делим ведущую строку на ведущий элемент
+    pivot_val = T[pivot_row, pivot_col]
+    for j in range(n + 1):
+        T[pivot_row, j] /= pivot_val
+
+    # Обнуляем все остальные элементы в столбце: обновление ранга 1
+    # T -= col * prow, где col - копия ведущего столбца с нулём в ведущей строке
+    # (сама ведущая строка не меняется). Копии не пересекаются с T, поэтому
+    # внутренний цикл векторизуется без ветвлений и проверок наложения
+    # Внешний цикл - по столбцам: внутренний проходит столбец T подряд
+    prow = T[pivot_row].copy()
+    col = T[:, pivot_col].copy()
+    col[pivot_row] = 0.0
+    for j in range(n + 1):
+        p = prow[j]
+        for i in range(m + 1):
+            T[i, j] -= col[i] * p
+
+    _update_weights(gamma, prow, pivot_col, n)
+    return pivot_row, pivot_col
+
+
+@njit(_SIGNATURES, cache=True, fastmath=_FASTMATH)
+def pivot_generic(T, m, n, tol, gamma, bland, basis):
+    '''
+    Одна итерация симплекс-метода для таблиц произвольного размера.
+    Строки с нулевым элементом в ведущем столбце и столбцы с нулевым
+    элементом в ведущей строке пропускаются: в больших (обычно разреженных)
+    задачах таких много, и проход по ним только тратит пропускную
+    способность памяти.
+
+    Параметры и результат - как у pivot_small.
+    '''
+    pivot_row, pivot_col = _select_pivot(T, m, n, tol, gamma, bland, basis)
+    if pivot_row < 0:
+        return pivot_row, pivot_col
+
+    # Делим ведущую строку на ведущий элемент
+    pivot_val = T[pivot_row, pivot_col]
+    for j in range(n + 1):
+        T[pivot_row, j] /= pivot_val
+
+    # Обнуляем все остальные элементы в столбце (обновление ранга 1, как в pivot_small);
+    # номера строк с ненулевым множителем собираются один раз до прохода по столбцам
+    prow = T[pivot_row].copy()
+    col = T[:, pivot_col].copy()
+    col[pivot_row] = 0.0
+    # столбцы с нулём в ведущей строке не меняются и пропускаются целиком -
+    # для разреженных ограничений это большая часть таблицы
+    rows = np.nonzero(col)[0]
+    for j in range(n + 1):
+        p = prow[j]
+        if p == 0.0:
+            continue
+        for i in rows:
+            T[i, j] -= col[i] * p
+
+    _update_weights(gamma, prow, pivot_col, n)
+    return pivot_row, pivot_col
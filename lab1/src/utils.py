@@ -1,27 +1,42 @@
+import numpy as np
 from src.models import Solution, LinearProblem
 
 
 def write_solution(filename: str, solution: Solution, problem: LinearProblem | None = None) -> None:
     """
     Записывает решение. Если передан problem, то выводит только исходные переменные,
-    учитывая их знаки (x>=0 или x<=0).
+    учитывая их знаки (x>=0 или x<=0), и проверку ограничений исходной задачи.
     """
-    with open(filename, 'w', encoding='utf-8') as f:
-        if not solution.found:
-            f.write("Решение не найдено.\nПричина: " + solution.reason + "\n")
-            return
+    # весь текст собирается в памяти и записывается в файл одним вызовом
+    if not solution.found:
+        lines = ["Решение не найдено.", "Причина: " + solution.reason]
+    elif problem is None:
+        lines = [
+            "Оптимальная точка: " + ', '.join(map(str, solution.point)),
+            "Значение целевой функции: " + str(solution.value),
+        ]
+    else:
+        k = problem.n_original_vars
+        x_original = np.asarray(problem.var_signs[:k], dtype=np.float64) * np.asarray(solution.point[:k])
 
-        if problem is None:
-            f.write("Оптимальная точка: " + ', '.join(map(str, solution.point)) + "\n")
-            f.write("Значение целевой функции: " + str(solution.value) + "\n")
-            return
+        lines = ["Оптимальные значения исходных переменных:"]
+        lines += [f"  {name}: {val}" for name, val in zip(problem.var_names[:k], x_original.tolist())]
+        lines.append("Значение целевой функции: " + str(solution.value))
 
-        k = problem.n_original_vars
-        y = solution.point[:k]
-        signs = problem.var_signs[:k]
-        x_original = [signs[i] * y[i] for i in range(k)]
+        # Проверка ограничений: левые части всех ограничений - одно произведение A @ x,
+        # выполнение каждого ограничения - одно сравнение массивов
+        lefts = problem.constraints[:, :k] @ x_original
+        signs = np.asarray(problem.signs)
+        ok = np.where(
+            signs == '<=', lefts <= problem.rhs + 1e-9,
+            np.where(signs == '>=', lefts >= problem.rhs - 1e-9, np.abs(lefts - problem.rhs) <= 1e-9),
+        )
+        lines.append("Проверка ограничений:")
+        lines += [
+            f"  {i}) {left} {sign} {rhs}: {'выполнено' if satisfied else 'нарушено'}"
+            for i, (left, sign, rhs, satisfied)
+            in enumerate(zip(lefts.tolist(), problem.signs, problem.rhs.tolist(), ok.tolist()), 1)
+        ]
 
-        f.write("Оптимальные значения исходных переменных:\n")
-        for name, val in zip(problem.var_names[:k], x_original):
-            f.write(f"  {name}: {val}\n")
-        f.write("Значение целевой функции: " + str(solution.value) + "\n")
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
@@ -4,7 +4,7 @@
 """
 import os
 import argparse
-from src.function_parser import parse_function, estimate_lipschitz_constant
+from src.function_parser import parse_function, parse_function_vectorized, estimate_lipschitz_constant
 from src.test_functions import get_test_function, get_function_string
 from src.optimizer import piyavskii_shubert
 from src.visualizer import visualize
@@ -113,7 +113,12 @@ def main():
     # Оценка константы Липшица
     if args.L is None:
         print("\nОцениваем константу Липшица...")
-        L = estimate_lipschitz_constant(func, a, b)
+        # для оценки используется векторизованная версия функции: все точки за один вызов;
+        # если выражение не вычисляется функциями numpy (например, log(x, 2)) - по точкам
+        try:
+            L = estimate_lipschitz_constant(parse_function_vectorized(func_str), a, b)
+        except ValueError:
+            L = estimate_lipschitz_constant(func, a, b)
         print(f"Оценка константы Липшица: L = {L:.4f}")
     else:
         L = args.L
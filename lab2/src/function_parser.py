@@ -2,9 +2,41 @@
 Парсер и вычислитель функций из строкового представления.
 Поддерживает основные математические функции и операции.
 """
+import ast
 import math
+import multiprocessing
+import os
+import time
+import types
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-from typing import Callable
+from numba.extending import is_jitted
+from typing import Callable, List, Optional
+
+
+# Безопасное пространство имён для eval: создаётся один раз при импорте модуля
+# и является глобальным пространством имён всех функций из parse_function
+_SAFE_GLOBALS = {
+    'sin': math.sin,
+    'cos': math.cos,
+    'tan': math.tan,
+    'asin': math.asin,
+    'acos': math.acos,
+    'atan': math.atan,
+    'sinh': math.sinh,
+    'cosh': math.cosh,
+    'tanh': math.tanh,
+    'exp': math.exp,
+    'log': math.log,
+    'log10': math.log10,
+    'sqrt': math.sqrt,
+    'abs': abs,
+    'fabs': math.fabs,
+    'pi': math.pi,
+    'e': math.e,
+    'pow': pow,
+    '__builtins__': {},
+}
 
 
 def safe_eval(expr: str, x: float) -> float:
@@ -15,42 +47,43 @@ def safe_eval(expr: str, x: float) -> float:
     :param x: значение переменной
     :return: значение функции в точке x
     """
-    # Создаём безопасное пространство имён для eval
-    safe_dict = {
-        'x': x,
-        'sin': math.sin,
-        'cos': math.cos,
-        'tan': math.tan,
-        'asin': math.asin,
-        'acos': math.acos,
-        'atan': math.atan,
-        'sinh': math.sinh,
-        'cosh': math.cosh,
-        'tanh': math.tanh,
-        'exp': math.exp,
-        'log': math.log,
-        'log10': math.log10,
-        'sqrt': math.sqrt,
-        'abs': abs,
-        'fabs': math.fabs,
-        'pi': math.pi,
-        'e': math.e,
-        'pow': pow,
-        '__builtins__': {},
-    }
-
     try:
-        return float(eval(expr, safe_dict))
+        return float(eval(expr, _SAFE_GLOBALS, {'x': x}))
     except Exception as e:
         raise ValueError(f"Ошибка при вычислении выражения '{expr}' в точке x={x}: {e}")
 
 
-def parse_function(func_str: str) -> Callable[[float], float]:
+# Пространство имён для векторизованного вычисления: функции numpy
+# применяются сразу ко всему массиву x
+_NUMPY_SAFE_DICT = {
+    'sin': np.sin,
+    'cos': np.cos,
+    'tan': np.tan,
+    'asin': np.arcsin,
+    'acos': np.arccos,
+    'atan': np.arctan,
+    'sinh': np.sinh,
+    'cosh': np.cosh,
+    'tanh': np.tanh,
+    'exp': np.exp,
+    'log': np.log,
+    'log10': np.log10,
+    'sqrt': np.sqrt,
+    'abs': np.abs,
+    'fabs': np.fabs,
+    'pi': np.pi,
+    'e': np.e,
+    'pow': np.power,
+    '__builtins__': {},
+}
+
+
+def _normalize(func_str: str) -> str:
     """
-    Парсит строку функции и возвращает callable объект.
+    Приводит строку функции к выражению Python.
 
-    :param func_str: строка функции (например, "x + sin(3.14159*x)" или "f(x) = x^2")
-    :return: функция f(x)
+    :param func_str: строка функции (например, "f(x) = x^2")
+    :return: выражение (например, "x**2")
     """
     # Убираем "f(x) = " если есть
     func_str = func_str.strip()
@@ -58,27 +91,199 @@ def parse_function(func_str: str) -> Callable[[float], float]:
         func_str = func_str.split('=')[-1].strip()
 
     # Заменяем ^ на ** для возведения в степень
-    func_str = func_str.replace('^', '**')
+    return func_str.replace('^', '**')
+
+
+def _code_names(code: types.CodeType) -> set:
+    """
+    Имена, используемые объектом кода и всеми вложенными в него объектами
+    кода (лямбды, генераторы списков и т. п. хранятся в co_consts).
+
+    :param code: объект кода
+    :return: множество имён
+    """
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _code_names(const)
+    return names
+
+
+def _parse(expr: str) -> ast.Expression:
+    """
+    Разбирает выражение в синтаксическое дерево.
+
+    :param expr: выражение Python
+    :return: дерево выражения
+    """
+    try:
+        return ast.parse(expr, '<f>', 'eval')
+    except SyntaxError as e:
+        raise ValueError(f"Ошибка в выражении '{expr}': {e}")
+
+
+def _compile(expr: str):
+    """
+    Компилирует выражение в байт-код и проверяет, что в нём используются
+    только допустимые имена.
+
+    :param expr: выражение Python
+    :return: объект кода для eval
+    """
+    code = compile(_parse(expr), '<f>', 'eval')
+
+    # Все имена в выражении, включая вложенные функции, должны быть из
+    # безопасного пространства имён (или x): проверяется один раз здесь,
+    # а не при каждом вычислении
+    unknown = _code_names(code) - _SAFE_GLOBALS.keys() - {'x'}
+    if unknown:
+        raise ValueError(f"Ошибка в выражении '{expr}': неизвестные имена {sorted(unknown)}")
+    return code
+
+
+def parse_function(func_str: str) -> Callable[[float], float]:
+    """
+    Парсит строку функции и возвращает callable объект.
+
+    :param func_str: строка функции (например, "x + sin(3.14159*x)" или "f(x) = x^2")
+    :return: функция f(x)
+    """
+    func_str = _normalize(func_str)
+
+    # Проверка синтаксиса и имён
+    _compile(func_str)
+
+    # Из выражения генерируется обычная функция с глобальным пространством имён
+    # _SAFE_GLOBALS: вызов не проходит через eval и не создаёт словарь локальных
+    # переменных. Обёртки try/except нет - ошибки области определения
+    # (например, math domain error) выбрасываются как есть.
+    # В шаблон подставляется дерево проверенного выражения, а не его текст:
+    # комментарии и переносы строк в выражении не ломают шаблон
+    template = _parse("lambda _float: lambda x: _float(_expr)")
+    template.body.body.body.args[0] = _parse(func_str).body
+    make_function = eval(compile(ast.fix_missing_locations(template), '<f>', 'eval'), _SAFE_GLOBALS)
+    return make_function(float)
+
+
+def parse_function_vectorized(func_str: str) -> Callable[[np.ndarray], np.ndarray]:
+    """
+    Парсит строку функции и возвращает функцию, вычисляемую сразу на массиве точек.
 
-    # Создаём функцию
-    def f(x: float) -> float:
-        return safe_eval(func_str, x)
+    :param func_str: строка функции (например, "x + sin(3.14159*x)" или "f(x) = x^2")
+    :return: функция f(x) для numpy-массива x
+    """
+    code = _compile(_normalize(func_str))
+
+    def f(x: np.ndarray) -> np.ndarray:
+        # ошибки области определения (log(0), sqrt(-1), переполнение) - исключения, как в math
+        try:
+            with np.errstate(divide='raise', over='raise', invalid='raise'):
+                return eval(code, {'x': x, **_NUMPY_SAFE_DICT})
+        except Exception as e:
+            raise ValueError(f"Ошибка при вычислении выражения '{func_str}': {e}")
 
     return f
 
 
-def estimate_lipschitz_constant(func: Callable[[float], float], a: float, b: float, n_samples: int = 1000) -> float:
+# Запуск пула процессов через fork стоит десятки миллисекунд, поэтому пул
+# используется, только если последовательное вычисление оставшихся точек
+# заняло бы не меньше _PARALLEL_MIN_SECONDS секунд
+_PARALLEL_MIN_SECONDS = 0.5
+
+# Число точек, по которым оценивается время одного вызова функции
+_PROBE_SAMPLES = 10
+
+# Функция, вычисляемая в процессах-исполнителях (задаётся инициализатором пула)
+_worker_func = None
+
+
+def _init_worker(func: Callable[[float], float]) -> None:
+    """
+    Инициализатор процесса-исполнителя: запоминает вычисляемую функцию.
+    При запуске через fork функция наследуется, а не сериализуется,
+    поэтому подходят и лямбды, и замыкания из parse_function.
+    """
+    global _worker_func
+    _worker_func = func
+
+
+def _eval_chunk(chunk: np.ndarray) -> List[float]:
+    """
+    Вычисляет функцию процесса-исполнителя в точках chunk.
+    """
+    return [_worker_func(x) for x in chunk]
+
+
+def _eval_pointwise(func: Callable[[float], float], x_samples: np.ndarray, n_workers: int) -> np.ndarray:
+    """
+    Поточечное вычисление функции; если точек много и функция дорогая -
+    параллельно в n_workers процессах.
+
+    :param func: скалярная функция
+    :param x_samples: точки
+    :param n_workers: число процессов
+    :return: массив значений функции
+    """
+    # Параллельный запуск оправдан, только если на процесс приходится хотя бы
+    # 10 точек; процессы создаются через fork (где он доступен)
+    if n_workers <= 1 or len(x_samples) < 10 * n_workers or 'fork' not in multiprocessing.get_all_start_methods():
+        return np.array([func(x) for x in x_samples])
+
+    # Время одного вызова оцениваем по первым точкам; для дешёвой функции
+    # остальные точки тоже вычисляются последовательно
+    start = time.perf_counter()
+    head = [func(x) for x in x_samples[:_PROBE_SAMPLES]]
+    call_time = (time.perf_counter() - start) / _PROBE_SAMPLES
+    rest = x_samples[_PROBE_SAMPLES:]
+    if call_time * len(rest) < _PARALLEL_MIN_SECONDS:
+        return np.array(head + [func(x) for x in rest])
+
+    chunks = np.array_split(rest, n_workers)
+    with ProcessPoolExecutor(
+        max_workers=n_workers,
+        mp_context=multiprocessing.get_context('fork'),
+        initializer=_init_worker,
+        initargs=(func,),
+    ) as executor:
+        return np.concatenate([np.asarray(head, dtype=float)] +
+                              [np.asarray(values, dtype=float) for values in executor.map(_eval_chunk, chunks)])
+
+
+def estimate_lipschitz_constant(
+    func: Callable[[float], float],
+    a: float,
+    b: float,
+    n_samples: int = 1000,
+    n_workers: Optional[int] = None,
+) -> float:
     """
     Оценивает константу Липшица функции на отрезке [a, b].
 
-    :param func: функция для оценки
+    :param func: функция для оценки (скалярная или векторизованная)
     :param a: левый конец отрезка
     :param b: правый конец отрезка
     :param n_samples: количество точек для оценки
+    :param n_workers: число процессов для поточечного вычисления скалярной функции
+                      (по умолчанию - число ядер; пул запускается только
+                      для дорогой функции, см. _eval_pointwise)
     :return: оценка константы Липшица
     """
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+
     x_samples = np.linspace(a, b, n_samples)
-    f_samples = np.array([func(x) for x in x_samples])
+
+    # Функции, скомпилированные Numba (например, из get_test_function),
+    # скалярные: вызов на массиве только запустил бы неудачную компиляцию.
+    # Остальные сначала пробуем вычислить на всём массиве одним вызовом;
+    # если функция скалярная, вычисляем поточечно
+    if is_jitted(func):
+        f_samples = _eval_pointwise(func, x_samples, n_workers)
+    else:
+        try:
+            f_samples = np.broadcast_to(np.asarray(func(x_samples), dtype=float), x_samples.shape)
+        except Exception:
+            f_samples = _eval_pointwise(func, x_samples, n_workers)
 
     # Оцениваем производную через конечные разности
     dx = (b - a) / (n_samples - 1)
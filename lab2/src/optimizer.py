@@ -2,11 +2,18 @@
 Реализация метода Пиявского (Piyavskii-Shubert) для глобальной оптимизации
 липшицевых функций.
 """
+import bisect
+import heapq
 import time
 from typing import List, Tuple, Callable
 import numpy as np
 
 
+# Число точек функции, конусы которых обрабатываются за один проход при
+# построении ломаной: временная матрица n_samples x блок не растёт с числом точек
+_BROKEN_LINE_BLOCK = 256
+
+
 class OptimizationResult:
     """Результат оптимизации."""
 
@@ -16,14 +23,14 @@ class OptimizationResult:
         f_min: float,
         iterations: int,
         elapsed_time: float,
-        broken_line_points: List[Tuple[float, float]],
+        broken_line_points: np.ndarray,
         function_points: List[Tuple[float, float]],
     ):
         self.x_min = x_min
         self.f_min = f_min
         self.iterations = iterations
         self.elapsed_time = elapsed_time
-        self.broken_line_points = broken_line_points  # точки ломаной линии
+        self.broken_line_points = broken_line_points  # точки ломаной линии (столбцы x, y)
         self.function_points = function_points  # точки функции
 
 
@@ -56,27 +63,39 @@ def piyavskii_shubert(
     """
     start_time = time.time()
 
-    # Начальные точки
-    points = [(a, func(a)), (b, func(b))]
-    function_points = points.copy()
+    # Очередь интервалов между соседними вычисленными точками, упорядоченная
+    # по нижней оценке функции на интервале: на каждой итерации берём интервал
+    # с наименьшей оценкой, его точка минимума - минимум всей ломаной
+    fa, fb = func(a), func(b)
+    heap = []
+    _push_interval(heap, a, fa, b, fb, L)
+
+    # Вычисленные точки в порядке возрастания x (параллельные списки)
+    xs = [a, b]
+    fs = [fa, fb]
+
+    # Лучшая из вычисленных точек (при равных значениях - вычисленная раньше)
+    x_best, f_best = (b, fb) if fb < fa else (a, fa)
 
     iteration = 0
 
-    while iteration < max_iterations:
+    while iteration < max_iterations and heap:
         iteration += 1
 
-        # Сортируем точки по x
-        points.sort(key=lambda p: p[0])
-
         # Находим точку минимума ломаной линии
-        x_min, f_min_lower = find_broken_line_minimum(points, L)
+        f_min_lower, x_min, x1, f1, x2, f2 = heapq.heappop(heap)
 
         # Вычисляем значение функции в найденной точке
         f_min_actual = func(x_min)
-        function_points.append((x_min, f_min_actual))
+        idx = bisect.bisect_right(xs, x_min)
+        xs.insert(idx, x_min)
+        fs.insert(idx, f_min_actual)
+        if f_min_actual < f_best:
+            x_best, f_best = x_min, f_min_actual
 
-        # Добавляем новую точку
-        points.append((x_min, f_min_actual))
+        # Новая точка делит интервал на два
+        _push_interval(heap, x1, f1, x_min, f_min_actual, L)
+        _push_interval(heap, x_min, f_min_actual, x2, f2, L)
 
         # Проверяем условие остановки
         # Останавливаемся, когда разница между нижней оценкой и фактическим значением
@@ -84,77 +103,41 @@ def piyavskii_shubert(
         if abs(f_min_actual - f_min_lower) < eps:
             break
 
-    # Находим глобальный минимум среди всех вычисленных точек
-    best_point = min(function_points, key=lambda p: p[1])
-    x_min = best_point[0]
-    f_min = best_point[1]
-
     elapsed_time = time.time() - start_time
 
     # Строим финальную ломаную линию для визуализации
-    points.sort(key=lambda p: p[0])
-    broken_line_points = build_broken_line(points, L, a, b)
+    function_points = list(zip(xs, fs))
+    broken_line_points = build_broken_line(function_points, L, a, b)
 
     return OptimizationResult(
-        x_min=x_min,
-        f_min=f_min,
+        x_min=x_best,
+        f_min=f_best,
         iterations=iteration,
         elapsed_time=elapsed_time,
         broken_line_points=broken_line_points,
-        function_points=sorted(function_points, key=lambda p: p[0]),
+        function_points=function_points,
     )
 
 
-def find_broken_line_minimum(points: List[Tuple[float, float]], L: float) -> Tuple[float, float]:
+def _push_interval(heap: list, x1: float, f1: float, x2: float, f2: float, L: float) -> None:
     """
-    Находит точку минимума ломаной линии (нижней оценки функции).
-
-    Ломаная линия строится как:
-    phi(x) = max_i (f(x_i) - L * |x - x_i|)
+    Добавляет в очередь интервал [x1, x2] с точкой пересечения конусов
+    и нижней оценкой функции в ней.
 
-    Минимум ломаной находится в точке пересечения двух "конусов".
-
-    :param points: список точек (x, f(x))
-    :param L: константа Липшица
-    :return: (x_min, f_min) - точка и значение минимума ломаной
+    :param heap: очередь интервалов (lower_bound, x_intersect, x1, f1, x2, f2)
     """
-    if len(points) < 2:
-        return points[0]
-
-    points = sorted(points, key=lambda p: p[0])
-    min_x = points[0][0]
-    min_f = float('inf')
-
-    # Проверяем минимумы в точках пересечения конусов
-    for i in range(len(points) - 1):
-        x1, f1 = points[i]
-        x2, f2 = points[i + 1]
-
-        # Точка пересечения двух конусов
-        # f1 - L*(x - x1) = f2 - L*(x2 - x)
-        # Решаем: f1 - L*x + L*x1 = f2 - L*x2 + L*x
-        # 2*L*x = f1 - f2 + L*(x1 + x2)
-        # x = (f1 - f2 + L*(x1 + x2)) / (2*L)
-
-        if abs(x2 - x1) > 1e-10:  # избегаем деления на ноль
-            x_intersect = (f1 - f2 + L * (x1 + x2)) / (2 * L)
+    if x2 - x1 <= 1e-10:  # вырожденный интервал не делим
+        return
 
-            # Проверяем, что точка пересечения между x1 и x2
-            if x1 <= x_intersect <= x2:
-                f_intersect = f1 - L * abs(x_intersect - x1)
-                if f_intersect < min_f:
-                    min_f = f_intersect
-                    min_x = x_intersect
-
-    # Также проверяем значения в самих точках
-    for x, f in points:
-        # Вычисляем значение ломаной в точке x
-        broken_value = max(f_i - L * abs(x - x_i) for x_i, f_i in points)
-        if broken_value < min_f:
-            min_f = broken_value
-            min_x = x
-
-    return min_x, min_f
+    # Точка пересечения конусов f1 - L*(x - x1) = f2 - L*(x2 - x);
+    # при заниженной L она может выйти за интервал - тогда берём ближайший конец
+    x_intersect = (f1 - f2 + L * (x1 + x2)) / (2 * L)
+    if x1 <= x_intersect <= x2:
+        lower_bound = f1 - L * (x_intersect - x1)
+    else:
+        x_intersect = min(max(x_intersect, x1), x2)
+        lower_bound = max(f1 - L * (x_intersect - x1), f2 - L * (x2 - x_intersect))
+    heapq.heappush(heap, (lower_bound, x_intersect, x1, f1, x2, f2))
 
 
 def build_broken_line(
@@ -163,7 +146,7 @@ def build_broken_line(
     a: float,
     b: float,
     n_samples: int = 1000
-) -> List[Tuple[float, float]]:
+) -> np.ndarray:
     """
     Строит ломаную линию (нижнюю оценку функции) для визуализации.
 
@@ -172,14 +155,18 @@ def build_broken_line(
     :param a: левый конец отрезка
     :param b: правый конец отрезка
     :param n_samples: количество точек для построения
-    :return: список точек ломаной линии
+    :return: массив n_samples x 2: столбец x и столбец значений ломаной
     """
     x_samples = np.linspace(a, b, n_samples)
-    broken_line = []
-
-    for x in x_samples:
-        # Ломаная линия: максимум по всем конусам
-        value = max(f - L * abs(x - x_i) for x_i, f in points)
-        broken_line.append((x, value))
-
-    return broken_line
+    x_points, f_points = np.array(points, dtype=np.float64).T
+
+    # Ломаная линия: максимум по всем конусам, для всех x сразу; конусы берутся
+    # блоками по _BROKEN_LINE_BLOCK точек (матрица n_samples x блок), и максимум
+    # накапливается, так что память - O(n_samples) при любом числе точек
+    values = np.full(n_samples, -np.inf)
+    for start in range(0, len(x_points), _BROKEN_LINE_BLOCK):
+        xs = x_points[start:start + _BROKEN_LINE_BLOCK]
+        fs = f_points[start:start + _BROKEN_LINE_BLOCK]
+        np.maximum(values, (fs[None, :] - L * np.abs(x_samples[:, None] - xs[None, :])).max(axis=1), out=values)
+
+    return np.column_stack((x_samples, values))
@@ -5,6 +5,7 @@
 import math
 import numpy as np
 from typing import Callable
+from numba import njit
 
 
 def rastrigin_1d(x: float, A: float = 10.0, n: float = 2.0) -> float:
@@ -51,6 +52,41 @@ def griewank_1d(x: float) -> float:
     return 1 + (x**2) / 4000 - math.cos(x)
 
 
+# Скомпилированные версии тестовых функций: используются оптимизатором.
+# Параметры по умолчанию подставляются при компиляции обёрток от одного
+# аргумента: вызов из Python с пропущенными аргументами проходит медленный
+# путь диспетчера Numba (десятки микросекунд на вызов)
+_rastrigin_1d_jit = njit(cache=True)(rastrigin_1d)
+_ackley_1d_jit = njit(cache=True)(ackley_1d)
+
+
+@njit(cache=True)
+def rastrigin_1d_nb(x):
+    return _rastrigin_1d_jit(x)
+
+
+@njit(cache=True)
+def ackley_1d_nb(x):
+    return _ackley_1d_jit(x)
+
+
+griewank_1d_nb = njit(cache=True)(griewank_1d)
+
+
+# Таблицы тестовых функций и их строковых представлений (ключи в нижнем регистре)
+_TEST_FUNCS = {
+    'rastrigin': rastrigin_1d_nb,
+    'ackley': ackley_1d_nb,
+    'griewank': griewank_1d_nb,
+}
+
+_TEST_STRS = {
+    'rastrigin': '10*2 + x^2 - 10*cos(2*pi*x)',
+    'ackley': '-20*exp(-0.2*sqrt(x^2)) - exp(cos(2*pi*x)) + 20 + e',
+    'griewank': '1 + x^2/4000 - cos(x)',
+}
+
+
 def get_test_function(name: str) -> Callable[[float], float]:
     """
     Возвращает тестовую функцию по имени.
@@ -58,16 +94,10 @@ def get_test_function(name: str) -> Callable[[float], float]:
     :param name: имя функции ('rastrigin', 'ackley', 'griewank')
     :return: функция f(x)
     """
-    functions = {
-        'rastrigin': rastrigin_1d,
-        'ackley': ackley_1d,
-        'griewank': griewank_1d,
-    }
-
-    if name.lower() not in functions:
-        raise ValueError(f"Неизвестная функция: {name}. Доступны: {list(functions.keys())}")
-
-    return functions[name.lower()]
+    try:
+        return _TEST_FUNCS[name.lower()]
+    except KeyError:
+        raise ValueError(f"Неизвестная функция: {name}. Доступны: {list(_TEST_FUNCS.keys())}") from None
 
 
 def get_function_string(name: str) -> str:
@@ -77,10 +107,9 @@ def get_function_string(name: str) -> str:
     :param name: имя функции
     :return: строка функции
     """
-    strings = {
-        'rastrigin': '10*2 + x^2 - 10*cos(2*pi*x)',
-        'ackley': '-20*exp(-0.2*sqrt(x^2)) - exp(cos(2*pi*x)) + 20 + e',
-        'griewank': '1 + x^2/4000 - cos(x)',
-    }
+    return _TEST_STRS.get(name.lower(), 'x^2')
+
 
-    return strings.get(name.lower(), 'x^2')
+# Прогрев: компиляция (или загрузка из кэша) при импорте, а не при первом вызове в оптимизаторе
+for _func in _TEST_FUNCS.values():
+    _func(0.0)
@@ -33,9 +33,9 @@ def visualize(
     ax.plot(x_fine, y_fine, 'b-', linewidth=2, label='Исходная функция f(x)')
 
     # Строим ломаную линию (нижнюю оценку)
-    if result.broken_line_points:
-        x_broken = [p[0] for p in result.broken_line_points]
-        y_broken = [p[1] for p in result.broken_line_points]
+    if len(result.broken_line_points):
+        x_broken = result.broken_line_points[:, 0]
+        y_broken = result.broken_line_points[:, 1]
         ax.plot(x_broken, y_broken, 'r--', linewidth=1.5, alpha=0.7, label='Ломаная линия (нижняя оценка)')
 
     # Отмечаем вычисленные точки функции
@@ -0,0 +1,51 @@
+"""
+Тесты поточечного вычисления функции при оценке константы Липшица.
+
+Запуск из каталога lab2: python -m unittest discover tests
+"""
+import math
+import multiprocessing
+import os
+import time
+import unittest
+
+import numpy as np
+
+from src.function_parser import _eval_pointwise, estimate_lipschitz_constant, parse_function
+
+
+def _slow_pid(x: float) -> float:
+    """Дорогая скалярная функция: номер процесса, в котором она вычислена."""
+    time.sleep(0.005)
+    return float(os.getpid())
+
+
+def _slow_sin(x: float) -> float:
+    """Дорогая скалярная функция sin(x) (не вычисляется на массиве)."""
+    time.sleep(0.005)
+    return math.sin(x)
+
+
+@unittest.skipUnless('fork' in multiprocessing.get_all_start_methods(), "нужен запуск процессов через fork")
+class EvalPointwiseTest(unittest.TestCase):
+
+    def test_cheap_function_stays_serial(self):
+        values = _eval_pointwise(lambda x: float(os.getpid()), np.linspace(0, 1, 200), n_workers=2)
+        self.assertEqual(set(values.tolist()), {float(os.getpid())})
+
+    def test_expensive_function_uses_pool(self):
+        values = _eval_pointwise(_slow_pid, np.linspace(0, 1, 200), n_workers=2)
+        self.assertEqual(len(values), 200)
+        self.assertTrue(set(values.tolist()) - {float(os.getpid())})
+
+    def test_pool_matches_serial(self):
+        x_samples = np.linspace(-2, 2, 200)
+        pooled = _eval_pointwise(_slow_sin, x_samples, n_workers=2)
+        np.testing.assert_array_equal(pooled, np.sin(x_samples))
+        self.assertAlmostEqual(estimate_lipschitz_constant(_slow_sin, -2, 2, n_samples=200, n_workers=2),
+                               estimate_lipschitz_constant(parse_function('sin(x)'), -2, 2, n_samples=200,
+                                                           n_workers=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,8 +2,8 @@
 Главный файл для решения задачи управления инвестиционным портфелем
 методом стохастического динамического программирования.
 """
-from src.models import PortfolioState, Stage, Scenario, Action
-from src.solver import InvestmentSolver
+from src.models import PortfolioState, Stage, Scenario
+from src.solver import InvestmentSolver, decode_action
 
 
 def create_stages() -> list[Stage]:
@@ -51,13 +51,13 @@ def create_stages() -> list[Stage]:
     return stages
 
 
-def print_strategy(strategy_by_stage: dict[int, dict[PortfolioState, Action]],
+def print_strategy(strategy_by_stage: dict[int, dict[PortfolioState, int]],
                    max_value: float):
     """
     Вывод оптимальной стратегии по этапам.
 
     Args:
-        strategy_by_stage: словарь стратегий по этапам
+        strategy_by_stage: словарь стратегий по этапам (коды действий)
         max_value: максимальное ожидаемое значение
     """
     print("=" * 80)
@@ -83,7 +83,7 @@ def print_strategy(strategy_by_stage: dict[int, dict[PortfolioState, Action]],
         count = 0
         for state, action in list(stage_strategy.items())[:5]:
             print(f"  Состояние: {state}")
-            print(f"  Оптимальное действие: {action}")
+            print(f"  Оптимальное действие: {decode_action(action)}")
             print()
             count += 1
 
@@ -114,8 +114,8 @@ def print_optimal_path(solver: InvestmentSolver, initial_state: PortfolioState):
     for i, node in enumerate(path):
         print(f"Этап {node.stage + 1}:")
         print(f"  Состояние: {node.state}")
-        if node.action:
-            print(f"  Действие: {node.action}")
+        if node.action is not None:
+            print(f"  Действие: {decode_action(node.action)}")
         else:
             print(f"  Действие: Нет (терминальное состояние)")
         print(f"  Ожидаемое значение: {node.expected_value:.2f} д.е.")
@@ -193,7 +193,7 @@ def main():
     print("\n" + "=" * 80)
     print("СТАТИСТИКА РЕШЕНИЯ")
     print("=" * 80)
-    print(f"  Всего состояний в кэше: {len(solver.cache)}")
+    print(f"  Всего состояний в кэше: {sum(len(values) for values in solver.cache)}")
     print(f"  Начальная стоимость портфеля: {initial_state.cb1 + initial_state.cb2 + initial_state.dep + initial_state.cash:.2f} д.е.")
     print(f"  Максимальный ожидаемый доход: {max_expected_value:.2f} д.е.")
     print(f"  Ожидаемая доходность: {((max_expected_value / (initial_state.cb1 + initial_state.cb2 + initial_state.dep + initial_state.cash)) - 1) * 100:.2f}%")
@@ -2,14 +2,16 @@
 Модели данных для задачи управления инвестиционным портфелем.
 """
 from dataclasses import dataclass
-from typing import Tuple, List, Optional
+from typing import NamedTuple, Tuple, List, Optional
 
 
-@dataclass(frozen=True)
-class PortfolioState:
+class PortfolioState(NamedTuple):
     """
     Состояние портфеля: количество активов и свободные средства.
 
+    Состояние - ключ кэша решателя, поэтому оно реализовано как NamedTuple:
+    создание, хеширование и сравнение выполняются как у обычного кортежа.
+
     Атрибуты:
         cb1: объем ценной бумаги 1 (в д.е.)
         cb2: объем ценной бумаги 2 (в д.е.)
@@ -2,40 +2,354 @@
 Реализация решения задачи управления портфелем методом стохастического
 динамического программирования (обратный ход, уравнения Беллмана).
 """
+from itertools import product
 from typing import Dict, Tuple, List, Optional
 from dataclasses import dataclass
-from src.models import PortfolioState, Action, Stage, Scenario
+
+import numpy as np
+from numba import njit, prange, types
+from numba.typed import Dict as TypedDict
+
+from src.models import PortfolioState, Action, Stage
 
 
 # Размеры пакетов для операций
-PACKET_SIZES = {
-    'cb1': 25.0,   # 1/4 от начальной стоимости ЦБ1 (100)
-    'cb2': 200.0,  # 1/4 от начальной стоимости ЦБ2 (800)
-    'dep': 100.0   # 1/4 от начальной стоимости Деп (400)
-}
+CB1_PKT = 25.0    # 1/4 от начальной стоимости ЦБ1 (100)
+CB2_PKT = 200.0   # 1/4 от начальной стоимости ЦБ2 (800)
+DEP_PKT = 100.0   # 1/4 от начальной стоимости Деп (400)
 
 # Комиссии брокеров (в долях от суммы операции)
-COMMISSION_RATES = {
-    'cb1': 0.04,   # 4% для ЦБ1
-    'cb2': 0.07,   # 7% для ЦБ2
-    'dep': 0.05    # 5% для депозитов
-}
+CB1_COMM = 0.04   # 4% для ЦБ1
+CB2_COMM = 0.07   # 7% для ЦБ2
+DEP_COMM = 0.05   # 5% для депозитов
 
 # Минимальные ограничения на активы (в д.е.)
-MIN_VALUES = {
-    'cb1': 30.0,   # Минимум для ЦБ1
-    'cb2': 150.0,  # Минимум для ЦБ2
-    'dep': 100.0   # Минимум для депозитов
-}
+CB1_MIN = 30.0    # Минимум для ЦБ1
+CB2_MIN = 150.0   # Минимум для ЦБ2
+DEP_MIN = 100.0   # Минимум для депозитов
+
+# Число пакетов каждого актива в одном действии: от MIN_PACKAGES (продажа)
+# до MAX_PACKAGES (покупка)
+MIN_PACKAGES = -2
+MAX_PACKAGES = 3
+NUM_PACKAGES = MAX_PACKAGES - MIN_PACKAGES + 1
+NUM_ACTIONS = NUM_PACKAGES ** 3
+
+PACKET_SIZES = {'cb1': CB1_PKT, 'cb2': CB2_PKT, 'dep': DEP_PKT}
+COMMISSION_RATES = {'cb1': CB1_COMM, 'cb2': CB2_COMM, 'dep': DEP_COMM}
+MIN_VALUES = {'cb1': CB1_MIN, 'cb2': CB2_MIN, 'dep': DEP_MIN}
+
+# Число шагов сетки состояний на 1 д.е.: состояния хранятся в таблицах с точностью
+# до 0.01 д.е. (целое число копеек), состояния, отличающиеся меньше чем на
+# полшага сетки (0.005 д.е.) по каждой компоненте, считаются одним состоянием
+STATE_SCALE = 100
+
+# Ключ таблиц этапа: (cb1, cb2, dep, cash), компоненты состояния в шагах сетки.
+# Упаковать ключ в одно 64-битное число нельзя: каждая компонента в копейках
+# занимает до 18 бит уже при стоимости портфеля в несколько тысяч д.е.
+TABLE_KEY = types.UniTuple(types.int64, 4)
+
+# Значения в таблицах и состояния после действий в обратном ходе хранятся в
+# float32: погрешность состояния до 2-3 тыс. д.е. - около 0.006 копейки, много
+# меньше шага сетки, а объем данных вдвое меньше. Допустимость действий
+# проверяется до перехода к float32
+VALUE_TYPE = types.float32
+STATE_DTYPE = np.float32
+
+# Наибольшее увеличение общей стоимости при приведении состояния к сетке
+# (по полшага сетки на каждую из четырех компонент), д.е.
+SNAP_ERROR = 4 * 0.5 / STATE_SCALE
+
+# Относительный запас оценки сверху V_t на ошибки округления (в том числе
+# при хранении значений в float32)
+BOUND_TOLERANCE = 1e-6
+
+
+def encode_action(cb1_packages: int, cb2_packages: int, dep_packages: int) -> int:
+    """
+    Код действия: номер в сетке действий от 0 до NUM_ACTIONS - 1.
+
+    Args:
+        cb1_packages: количество пакетов ЦБ1
+        cb2_packages: количество пакетов ЦБ2
+        dep_packages: количество пакетов Деп
+
+    Returns:
+        Код действия
+    """
+    return (((cb1_packages - MIN_PACKAGES) * NUM_PACKAGES + (cb2_packages - MIN_PACKAGES))
+            * NUM_PACKAGES + (dep_packages - MIN_PACKAGES))
+
+
+def decode_action(code: int) -> Action:
+    """
+    Действие по его коду (см. encode_action).
+
+    Args:
+        code: код действия
+
+    Returns:
+        Действие с количеством пакетов каждого актива
+    """
+    rest, dep_packages = divmod(int(code), NUM_PACKAGES)
+    cb1_packages, cb2_packages = divmod(rest, NUM_PACKAGES)
+    return Action(cb1_packages + MIN_PACKAGES, cb2_packages + MIN_PACKAGES, dep_packages + MIN_PACKAGES)
+
+
+@njit(cache=True)
+def grid_key_nb(cb1, cb2, dep, cash):
+    """
+    Ключ таблиц этапа (TABLE_KEY) для состояния, приведенного к сетке.
+
+    Args:
+        cb1, cb2, dep, cash: состояние портфеля (в д.е.)
+
+    Returns:
+        Компоненты состояния в целых шагах сетки (копейках)
+    """
+    return (int(np.rint(cb1 * STATE_SCALE)), int(np.rint(cb2 * STATE_SCALE)),
+            int(np.rint(dep * STATE_SCALE)), int(np.rint(cash * STATE_SCALE)))
+
+
+@njit(cache=True)
+def lookup_value_nb(values, cb1, cb2, dep, cash):
+    """
+    Значение из таблицы этапа для состояния, приведенного к сетке.
+
+    Args:
+        values: таблица значений этапа (TABLE_KEY -> VALUE_TYPE)
+        cb1, cb2, dep, cash: состояние портфеля (в д.е.)
+
+    Returns:
+        V_t(s) в узле сетки
+    """
+    return values[grid_key_nb(cb1, cb2, dep, cash)]
+
+
+@njit(cache=True)
+def terminal_value_nb(cb1, cb2, dep, cash):
+    """
+    Терминальное значение (общая стоимость портфеля) в узле сетки.
+
+    Args:
+        cb1, cb2, dep, cash: состояние портфеля (в д.е.)
+
+    Returns:
+        Общая стоимость портфеля, приведенного к сетке
+    """
+    return (np.rint(cb1 * STATE_SCALE) + np.rint(cb2 * STATE_SCALE) +
+            np.rint(dep * STATE_SCALE) + np.rint(cash * STATE_SCALE)) / STATE_SCALE
+
+
+@njit(cache=True)
+def store_stage_nb(values, strategy, next_states, grid_states, best_values, best_codes, best_next):
+    """
+    Запись результатов ядра этапа в таблицы этапа.
+
+    Args:
+        values: таблица значений этапа (TABLE_KEY -> VALUE_TYPE)
+        strategy: таблица кодов оптимальных действий этапа (TABLE_KEY -> int64)
+        next_states: таблица состояний следующего этапа при первом сценарии (TABLE_KEY -> TABLE_KEY)
+        grid_states: квантованные состояния этапа (N, 4)
+        best_values: значения V_t в этих состояниях (N,)
+        best_codes: коды оптимальных действий (N,), -1 - действия нет
+        best_next: квантованные состояния следующего этапа при первом сценарии (N, 4)
+    """
+    for j in range(grid_states.shape[0]):
+        key = (grid_states[j, 0], grid_states[j, 1], grid_states[j, 2], grid_states[j, 3])
+        values[key] = np.float32(best_values[j])
+        if best_codes[j] >= 0:
+            strategy[key] = best_codes[j]
+            next_states[key] = (best_next[j, 0], best_next[j, 1], best_next[j, 2], best_next[j, 3])
+
+
+@njit(cache=True)
+def feasible_actions_nb(cb1, cb2, dep, cash, action_grid, thresholds):
+    """
+    Допустимость каждого действия сетки в состоянии (единое правило для
+    прямого прохода и ядра этапа: состояния, в которые ведут допустимые
+    действия, должны совпадать, иначе в таблице V_{t+1} не будет ключа).
+
+    Ограничения:
+    - Нельзя продать больше, чем есть (с учетом минимальных ограничений)
+    - Нельзя купить больше, чем позволяют свободные средства (с учетом комиссий)
+    - После операции активы должны быть не меньше минимальных значений
+
+    Args:
+        cb1, cb2, dep, cash: состояние портфеля (в д.е.)
+        action_grid: сетка действий (A, 3)
+        thresholds: пороги допустимости каждого действия (A, 4)
+
+    Returns:
+        Маска допустимых действий (A,)
+    """
+    # Определяем максимальное количество пакетов для продажи
+    # (нельзя продать так, чтобы осталось меньше минимального значения)
+    lower_cb1 = max(MIN_PACKAGES, -int((cb1 - CB1_MIN) / CB1_PKT))
+    lower_cb2 = max(MIN_PACKAGES, -int((cb2 - CB2_MIN) / CB2_PKT))
+    lower_dep = max(MIN_PACKAGES, -int((dep - DEP_MIN) / DEP_PKT))
+
+    # Определяем максимальное количество пакетов для покупки
+    # (ограничено свободными средствами с учетом комиссий)
+    # При покупке нужно заплатить: стоимость_пакета * (1 + комиссия)
+    upper_cb1 = min(MAX_PACKAGES, int(cash / (CB1_PKT * (1 + CB1_COMM))))
+    upper_cb2 = min(MAX_PACKAGES, int(cash / (CB2_PKT * (1 + CB2_COMM))))
+    upper_dep = min(MAX_PACKAGES, int(cash / (DEP_PKT * (1 + DEP_COMM))))
+
+    feasible = np.empty(action_grid.shape[0], dtype=np.bool_)
+    for a in range(action_grid.shape[0]):
+        feasible[a] = (lower_cb1 <= action_grid[a, 0] <= upper_cb1 and
+                       lower_cb2 <= action_grid[a, 1] <= upper_cb2 and
+                       lower_dep <= action_grid[a, 2] <= upper_dep and
+                       cb1 >= thresholds[a, 0] and cb2 >= thresholds[a, 1] and
+                       dep >= thresholds[a, 2] and cash >= thresholds[a, 3])
+    return feasible
+
+
+# Чтение таблиц из Python тоже идет через скомпилированные функции: операции
+# typed.Dict из интерпретатора компилируются заново в каждом процессе (без
+# кэша на диске), что дороже самого решения небольших задач
+@njit(cache=True)
+def table_items_nb(strategy):
+    """
+    Содержимое таблицы кодов оптимальных действий этапа в виде массивов.
+
+    Args:
+        strategy: таблица этапа (TABLE_KEY -> int64)
+
+    Returns:
+        Кортеж (квантованные состояния (N, 4), коды действий (N,)) в порядке
+        добавления в таблицу
+    """
+    grid_states = np.empty((len(strategy), 4), dtype=np.int64)
+    codes = np.empty(len(strategy), dtype=np.int64)
+    i = 0
+    for key, code in strategy.items():
+        grid_states[i, 0], grid_states[i, 1], grid_states[i, 2], grid_states[i, 3] = key
+        codes[i] = code
+        i += 1
+    return grid_states, codes
+
+
+@njit(cache=True)
+def path_step_nb(values, strategy, next_states, key):
+    """
+    Шаг оптимального пути на этапе: значение, действие и следующее состояние.
+
+    Args:
+        values: таблица значений этапа (TABLE_KEY -> VALUE_TYPE)
+        strategy: таблица кодов оптимальных действий этапа (TABLE_KEY -> int64)
+        next_states: таблица состояний следующего этапа при первом сценарии (TABLE_KEY -> TABLE_KEY)
+        key: квантованное состояние
+
+    Returns:
+        Кортеж (есть ли состояние в таблице, V_t(s), код оптимального действия
+        (-1 - действия нет), квантованное состояние следующего этапа)
+    """
+    if key not in values:
+        return False, 0.0, -1, key
+    value = np.float64(values[key])
+    if key not in strategy:
+        return True, value, -1, key
+    return True, value, strategy[key], next_states[key]
+
+
+# Ядро этапа. Состояния этапа обрабатываются параллельно (prange), для
+# каждого перебираются допустимые действия сетки (feasible_actions_nb, как в
+# прямом проходе), состояние после действия в STATE_DTYPE (как в
+# _states_after_actions) и математическое ожидание V_{t+1} по сценариям.
+# Если оценка сверху этого ожидания не больше лучшего уже найденного значения,
+# действие не может стать оптимальным (при равенстве выбирается более раннее),
+# и значения V_{t+1} для него не читаются из таблицы.
+# Параметры этапа передаются массивами, поэтому ядро одно для всех этапов и
+# решателей и компилируется один раз (с кэшем на диске)
+@njit(parallel=True, cache=True)
+def stage_kernel_nb(grid_states, values, terminal, probs, mults, growth, slack,
+                    action_grid, asset_deltas, cash_deltas, thresholds):
+    """
+    Значения V_t и оптимальные действия для всех состояний этапа.
+
+    Args:
+        grid_states: квантованные состояния этапа (N, 4)
+        values: таблица значений V_{t+1} следующего этапа (TABLE_KEY -> VALUE_TYPE)
+        terminal: следующий этап терминальный (V_{t+1} - терминальное значение,
+                  таблица values не используется, оценка сверху не нужна)
+        probs: вероятности сценариев этапа (S,)
+        mults: коэффициенты сценариев этапа (S, 3)
+        growth, slack: коэффициенты оценки сверху V_{t+1}(s) <= growth * total(s) + slack
+                       (с запасом BOUND_TOLERANCE)
+        action_grid: сетка действий (A, 3)
+        asset_deltas: изменения активов при каждом действии (A, 3)
+        cash_deltas: изменения свободных средств при каждом действии (A,)
+        thresholds: пороги допустимости каждого действия (A, 4)
+
+    Returns:
+        Кортеж (значения V_t (N,), коды оптимальных действий (N,; -1 -
+        допустимых действий нет), квантованные состояния следующего этапа
+        при первом сценарии (N, 4))
+    """
+    best_values = np.empty(grid_states.shape[0])
+    best_codes = np.full(grid_states.shape[0], -1, dtype=np.int64)
+    best_next = np.zeros((grid_states.shape[0], 4), dtype=np.int64)
+    for j in prange(grid_states.shape[0]):
+        state_cb1 = grid_states[j, 0] / STATE_SCALE
+        state_cb2 = grid_states[j, 1] / STATE_SCALE
+        state_dep = grid_states[j, 2] / STATE_SCALE
+        state_cash = grid_states[j, 3] / STATE_SCALE
+
+        feasible = feasible_actions_nb(state_cb1, state_cb2, state_dep, state_cash, action_grid, thresholds)
+
+        best = -np.inf
+        best_cb1 = best_cb2 = best_dep = best_cash = STATE_DTYPE(0)
+        for a in range(action_grid.shape[0]):
+            if not feasible[a]:
+                continue
+            cb1 = STATE_DTYPE(state_cb1 + asset_deltas[a, 0])
+            cb2 = STATE_DTYPE(state_cb2 + asset_deltas[a, 1])
+            dep = STATE_DTYPE(state_dep + asset_deltas[a, 2])
+            cash = STATE_DTYPE(state_cash + cash_deltas[a])
+
+            if not terminal:
+                total = 0.0
+                for k in range(probs.shape[0]):
+                    total += probs[k] * terminal_value_nb(cb1 * mults[k, 0], cb2 * mults[k, 1],
+                                                          dep * mults[k, 2], cash)
+                if growth * total + slack <= best:
+                    continue
+
+            value = 0.0
+            for k in range(probs.shape[0]):
+                if terminal:
+                    next_value = terminal_value_nb(cb1 * mults[k, 0], cb2 * mults[k, 1],
+                                                   dep * mults[k, 2], cash)
+                else:
+                    next_value = lookup_value_nb(values, cb1 * mults[k, 0], cb2 * mults[k, 1],
+                                                 dep * mults[k, 2], cash)
+                value += probs[k] * next_value
+            if value > best:
+                best = value
+                best_codes[j] = a
+                best_cb1, best_cb2, best_dep, best_cash = cb1, cb2, dep, cash
+
+        # Если нет допустимых действий, значение - терминальное; иначе
+        # запоминаем состояние следующего этапа при первом сценарии
+        if best_codes[j] < 0:
+            best = state_cb1 + state_cb2 + state_dep + state_cash
+        else:
+            best_next[j, 0], best_next[j, 1], best_next[j, 2], best_next[j, 3] = grid_key_nb(
+                best_cb1 * mults[0, 0], best_cb2 * mults[0, 1], best_dep * mults[0, 2], best_cash)
+        best_values[j] = best
+    return best_values, best_codes, best_next
 
 
 @dataclass
 class DecisionNode:
     """
-    Узел дерева решений: состояние и оптимальное действие на данном этапе.
+    Узел дерева решений: состояние и код оптимального действия на данном этапе
+    (см. decode_action).
     """
     state: PortfolioState
-    action: Optional[Action]
+    action: Optional[int]
     expected_value: float
     stage: int
 
@@ -44,8 +358,8 @@ class InvestmentSolver:
     """
     Решатель задачи оптимизации инвестиционного портфеля методом ДП.
 
-    Использует обратный ход динамического программирования с кэшированием
-    состояний для оптимизации производительности.
+    Использует обратный ход динамического программирования по таблицам
+    значений достижимых состояний каждого этапа.
     """
 
     def __init__(self, stages: List[Stage], initial_state: PortfolioState):
@@ -58,149 +372,127 @@ class InvestmentSolver:
         """
         self.stages = stages
         self.initial_state = initial_state
-        # Кэш для мемоизации: (stage, state) -> (expected_value, optimal_action)
-        self.cache: Dict[Tuple[int, PortfolioState], Tuple[float, Optional[Action]]] = {}
-        # История оптимальных решений для каждого состояния
-        self.optimal_strategy: Dict[Tuple[int, PortfolioState], Action] = {}
-
-    def _is_valid_state(self, state: PortfolioState) -> bool:
+        # Таблицы Numba по этапам с ключом TABLE_KEY: cache[t] - значения V_t(s)
+        # всех состояний этапа t (cache[T] терминального этапа остается пустой),
+        # optimal_strategy[t] - коды оптимальных действий там, где действие есть,
+        # next_states[t] - ключ состояния этапа t + 1 после оптимального действия
+        # при первом сценарии (для get_optimal_path)
+        self.cache: List[TypedDict] = []
+        self.optimal_strategy: List[TypedDict] = []
+        self.next_states: List[TypedDict] = []
+
+        # Множители сценариев каждого этапа для прямого прохода: factors[k] - (S, 4)
+        # для вектора состояния (cb1, cb2, dep, cash); свободные средства не меняются
+        # (множитель 1)
+        self.stage_factors: List[np.ndarray] = []
+        for stage in stages:
+            mults = np.array([scenario.multipliers for scenario in stage.scenarios], dtype=np.float64)
+            self.stage_factors.append(np.concatenate([mults, np.ones((len(mults), 1))], axis=1))
+
+        # Оценка сверху функции ценности: V_t(s) <= growth[t] * total(s) + slack[t].
+        # Действия не увеличивают общую стоимость (комиссии неотрицательны), а
+        # ожидаемый множитель стоимости за этап не больше наибольшего из
+        # ожидаемых множителей активов и 1 (свободные средства); приведение
+        # к сетке добавляет не более SNAP_ERROR на каждом этапе
+        growth, slack = [1.0], [0.0]
+        for stage in reversed(stages):
+            expected_mults = np.array([scenario.probability for scenario in stage.scenarios]) @ \
+                np.array([scenario.multipliers for scenario in stage.scenarios])
+            slack.insert(0, growth[0] * SNAP_ERROR + slack[0])
+            growth.insert(0, max(1.0, float(expected_mults.max())) * growth[0])
+
+        # Параметры ядра этапа (см. stage_kernel_nb): вероятности и коэффициенты
+        # сценариев, коэффициенты оценки сверху V_{t+1} с запасом на округление
+        self._stage_probs = [np.array([scenario.probability for scenario in stage.scenarios])
+                             for stage in stages]
+        self._stage_mults = [np.ascontiguousarray(factors[:, :3]) for factors in self.stage_factors]
+        self._stage_bounds = [(growth[stage_idx + 1] * (1 + BOUND_TOLERANCE),
+                               slack[stage_idx + 1] * (1 + BOUND_TOLERANCE))
+                              for stage_idx in range(len(stages))]
+
+        # Сетка всех действий (NUM_ACTIONS, 3): строка с номером code - количество
+        # пакетов каждого актива в действии с этим кодом (см. encode_action)
+        self._action_grid = np.empty((NUM_ACTIONS, 3), dtype=np.int64)
+        for packages in product(range(MIN_PACKAGES, MAX_PACKAGES + 1), repeat=3):
+            self._action_grid[encode_action(*packages)] = packages
+        # Изменения активов (A, 3) и свободных средств (A,) при каждом действии.
+        # Комиссия берется и с покупки, и с продажи: от модуля суммы операции.
+        # При покупке тратится стоимость пакета и комиссия,
+        # при продаже поступает стоимость пакета за вычетом комиссии
+        self._asset_deltas = self._action_grid * np.array([CB1_PKT, CB2_PKT, DEP_PKT])
+        commissions = (np.abs(self._asset_deltas[:, 0]) * CB1_COMM +
+                       np.abs(self._asset_deltas[:, 1]) * CB2_COMM +
+                       np.abs(self._asset_deltas[:, 2]) * DEP_COMM)
+        self._cash_deltas = -(self._asset_deltas[:, 0] + self._asset_deltas[:, 1] +
+                              self._asset_deltas[:, 2]) - commissions
+
+        # Действие допустимо, если каждая компонента состояния не меньше своего
+        # порога: актив - минимума за вычетом изменения, свободные средства -
+        # стоимости действия (см. feasible_actions_nb)
+        self._thresholds = np.column_stack([np.array([CB1_MIN, CB2_MIN, DEP_MIN]) - self._asset_deltas,
+                                            -self._cash_deltas])
+
+    def _quantize(self, state: PortfolioState) -> Tuple[int, int, int, int]:
         """
-        Проверка корректности состояния (все значения неотрицательны и
-        соблюдены минимальные ограничения).
+        Приведение состояния к сетке с шагом 1 / STATE_SCALE д.е.
+
+        После умножения на коэффициенты сценария состояния почти никогда не
+        совпадают точно, и число различных состояний растет почти как число
+        путей; квантованное состояние служит ключом таблиц значений.
 
         Args:
-            state: состояние для проверки
+            state: состояние портфеля
 
         Returns:
-            True, если состояние корректно
+            Компоненты состояния в целых шагах сетки (копейках)
         """
-        return (state.cb1 >= MIN_VALUES['cb1'] and
-                state.cb2 >= MIN_VALUES['cb2'] and
-                state.dep >= MIN_VALUES['dep'] and
-                state.cash >= 0)
+        return (int(round(state.cb1 * STATE_SCALE)), int(round(state.cb2 * STATE_SCALE)),
+                int(round(state.dep * STATE_SCALE)), int(round(state.cash * STATE_SCALE)))
 
-    def _apply_action(self, state: PortfolioState, action: Action) -> Optional[PortfolioState]:
+    def _snap(self, grid_state: Tuple[int, int, int, int]) -> PortfolioState:
         """
-        Применение действия к состоянию с проверкой ограничений и учетом комиссий.
-
-        Ограничения:
-        - Нельзя продать больше, чем есть (с учетом минимальных ограничений)
-        - Нельзя купить больше, чем позволяют свободные средства (с учетом комиссий)
-        - После операции активы должны быть не меньше минимальных значений
+        Состояние, соответствующее узлу сетки.
 
         Args:
-            state: текущее состояние
-            action: действие для применения
+            grid_state: квантованное состояние (результат _quantize)
 
         Returns:
-            Новое состояние после действия или None, если действие недопустимо
+            Состояние портфеля в д.е.
         """
-        # Вычисляем изменения в активах (без учета комиссий)
-        cb1_change = action.cb1_packages * PACKET_SIZES['cb1']
-        cb2_change = action.cb2_packages * PACKET_SIZES['cb2']
-        dep_change = action.dep_packages * PACKET_SIZES['dep']
-
-        # Вычисляем комиссии
-        total_commission = 0.0
-
-        # Комиссия при покупке (положительное количество пакетов)
-        if action.cb1_packages > 0:
-            total_commission += cb1_change * COMMISSION_RATES['cb1']
-        if action.cb2_packages > 0:
-            total_commission += cb2_change * COMMISSION_RATES['cb2']
-        if action.dep_packages > 0:
-            total_commission += dep_change * COMMISSION_RATES['dep']
-
-        # Комиссия при продаже (отрицательное количество пакетов)
-        if action.cb1_packages < 0:
-            total_commission += abs(cb1_change) * COMMISSION_RATES['cb1']
-        if action.cb2_packages < 0:
-            total_commission += abs(cb2_change) * COMMISSION_RATES['cb2']
-        if action.dep_packages < 0:
-            total_commission += abs(dep_change) * COMMISSION_RATES['dep']
-
-        # Вычисляем новое состояние активов
-        new_cb1 = state.cb1 + cb1_change
-        new_cb2 = state.cb2 + cb2_change
-        new_dep = state.dep + dep_change
-
-        # Вычисляем изменение свободных средств
-        # При покупке: тратим стоимость пакета + комиссию
-        # При продаже: получаем стоимость пакета - комиссию
-        cash_change = -(cb1_change + cb2_change + dep_change) - total_commission
-        new_cash = state.cash + cash_change
-
-        # Проверка ограничений
-        if (new_cb1 < MIN_VALUES['cb1'] or
-            new_cb2 < MIN_VALUES['cb2'] or
-            new_dep < MIN_VALUES['dep'] or
-            new_cash < 0):
-            return None
-
-        return PortfolioState(new_cb1, new_cb2, new_dep, new_cash)
-
-    def _apply_scenario(self, state: PortfolioState, scenario: Scenario) -> PortfolioState:
-        """
-        Применение сценария (изменение стоимости активов) к состоянию.
+        return PortfolioState._make(value / STATE_SCALE for value in grid_state)
 
-        Доходность применяется к сумме активов ПОСЛЕ принятия решения.
+    def _is_valid_state(self, state: PortfolioState) -> bool:
+        """
+        Проверка корректности состояния (все значения неотрицательны и
+        соблюдены минимальные ограничения).
 
         Args:
-            state: состояние после принятия решения
-            scenario: сценарий с коэффициентами изменения
+            state: состояние для проверки
 
         Returns:
-            Новое состояние после применения сценария
+            True, если состояние корректно
         """
-        mult_cb1, mult_cb2, mult_dep = scenario.multipliers
-
-        new_cb1 = state.cb1 * mult_cb1
-        new_cb2 = state.cb2 * mult_cb2
-        new_dep = state.dep * mult_dep
-        # Свободные средства не изменяются (не приносят доход)
-
-        return PortfolioState(new_cb1, new_cb2, new_dep, state.cash)
+        return (state.cb1 >= MIN_VALUES['cb1'] and
+                state.cb2 >= MIN_VALUES['cb2'] and
+                state.dep >= MIN_VALUES['dep'] and
+                state.cash >= 0)
 
-    def _generate_actions(self, state: PortfolioState) -> List[Action]:
+    def _states_after_actions(self, state: PortfolioState) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Генерация всех допустимых действий для данного состояния.
-
-        Генерирует все комбинации покупок/продаж пакетов в пределах ограничений.
+        Допустимые действия сетки и состояния после них.
 
         Args:
             state: текущее состояние
 
         Returns:
-            Список допустимых действий
+            Кортеж (коды допустимых действий (A,),
+            состояния (cb1, cb2, dep, cash) после этих действий (A, 4))
         """
-        actions = []
-
-        # Определяем максимальное количество пакетов для продажи
-        # (нельзя продать так, чтобы осталось меньше минимального значения)
-        max_sell_cb1 = int((state.cb1 - MIN_VALUES['cb1']) / PACKET_SIZES['cb1'])
-        max_sell_cb2 = int((state.cb2 - MIN_VALUES['cb2']) / PACKET_SIZES['cb2'])
-        max_sell_dep = int((state.dep - MIN_VALUES['dep']) / PACKET_SIZES['dep'])
-
-        # Определяем максимальное количество пакетов для покупки
-        # (ограничено свободными средствами с учетом комиссий)
-        # При покупке нужно заплатить: стоимость_пакета * (1 + комиссия)
-        max_buy_cb1 = int(state.cash / (PACKET_SIZES['cb1'] * (1 + COMMISSION_RATES['cb1'])))
-        max_buy_cb2 = int(state.cash / (PACKET_SIZES['cb2'] * (1 + COMMISSION_RATES['cb2'])))
-        max_buy_dep = int(state.cash / (PACKET_SIZES['dep'] * (1 + COMMISSION_RATES['dep'])))
-
-        # Генерируем все комбинации (ограничиваем диапазон для производительности)
-        # Используем разумные ограничения: от -2 до +2 пакетов для каждого актива
-        # Это покрывает большинство практических случаев
-        for cb1_p in range(-min(2, max_sell_cb1), min(3, max_buy_cb1) + 1):
-            for cb2_p in range(-min(2, max_sell_cb2), min(3, max_buy_cb2) + 1):
-                for dep_p in range(-min(2, max_sell_dep), min(3, max_buy_dep) + 1):
-                    action = Action(cb1_p, cb2_p, dep_p)
-                    # Проверяем допустимость действия
-                    new_state = self._apply_action(state, action)
-                    if new_state is not None:
-                        actions.append(action)
-
-        return actions
+        codes = np.flatnonzero(feasible_actions_nb(*state, self._action_grid, self._thresholds))
+        new_states = np.empty((len(codes), 4), dtype=STATE_DTYPE)
+        new_states[:, :3] = np.array(state[:3]) + self._asset_deltas[codes]
+        new_states[:, 3] = state.cash + self._cash_deltas[codes]
+        return codes, new_states
 
     def _terminal_value(self, state: PortfolioState) -> float:
         """
@@ -216,110 +508,106 @@ class InvestmentSolver:
         """
         return state.cb1 + state.cb2 + state.dep + state.cash
 
-    def solve(self) -> Tuple[float, Dict[int, Dict[PortfolioState, Action]]]:
+    def _successors(self, state: PortfolioState, stage_idx: int) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Решение задачи методом обратного хода ДП.
+        Допустимые действия и квантованные состояния после всех сценариев этапа.
+
+        Args:
+            state: текущее состояние
+            stage_idx: индекс текущего этапа (0-based)
 
         Returns:
-            Кортеж (максимальный ожидаемый доход, стратегия по этапам)
+            Кортеж (коды допустимых действий (A,), массив (A, S, 4)
+            целых шагов сетки): элемент [i, j] - состояние после действия i и сценария j
         """
-        # Очищаем кэш перед решением
-        self.cache.clear()
-        self.optimal_strategy.clear()
-
-        # Обратный ход: начинаем с последнего этапа
-        num_stages = len(self.stages)
-
-        # Вызываем рекурсивную функцию для начального состояния и первого этапа
-        max_expected_value = self._bellman_recursive(self.initial_state, 0)
+        codes, after_actions = self._states_after_actions(state)
 
-        # Формируем стратегию по этапам
-        strategy_by_stage: Dict[int, Dict[PortfolioState, Action]] = {}
-        for stage_idx in range(num_stages):
-            strategy_by_stage[stage_idx] = {}
-            # Собираем все оптимальные действия для данного этапа из кэша
-            for (s_idx, state), (_, action) in self.cache.items():
-                if s_idx == stage_idx and action is not None:
-                    strategy_by_stage[stage_idx][state] = action
+        # Состояния после действий (A, 4) и всех сценариев (A, S, 4) - одно
+        # умножение с транслированием, затем приведение к сетке
+        successors = after_actions[:, None, :] * self.stage_factors[stage_idx][None, :, :]
+        return codes, np.rint(successors * STATE_SCALE).astype(np.int64)
 
-        return max_expected_value, strategy_by_stage
+    def _reachable_states(self) -> List[List[Tuple[int, int, int, int]]]:
+        """
+        Прямой проход: квантованные состояния, достижимые из начального
+        к началу каждого этапа.
 
-    def _bellman_recursive(self, state: PortfolioState, stage_idx: int) -> float:
+        Returns:
+            Список длины len(stages): состояния сетки в начале каждого этапа
         """
-        Рекурсивная функция для вычисления уравнения Беллмана.
+        layers = [[self._quantize(self.initial_state)]]
+        for stage_idx in range(len(self.stages) - 1):
+            reachable = set()
+            for grid_state in layers[-1]:
+                _, successors = self._successors(self._snap(grid_state), stage_idx)
+                reachable.update(map(tuple, successors.reshape(-1, 4).tolist()))
+            layers.append(list(reachable))
+        return layers
+
+    def solve(self) -> Tuple[float, Dict[int, Dict[PortfolioState, int]]]:
+        """
+        Решение задачи методом обратного хода ДП.
 
         Уравнение Беллмана для стохастического случая:
-        V_t(s) = max_{a} E[R(s, a, ξ) + V_{t+1}(f(s, a, ξ))]
+        V_t(s) = max_{a} E[V_{t+1}(f(s, a, ξ))],  V_T(s) - терминальное значение
 
         где:
         - V_t(s) - функция ценности на этапе t в состоянии s
         - a - действие (управление)
         - ξ - случайная величина (сценарий)
-        - R(s, a, ξ) - доходность на этапе t
         - f(s, a, ξ) - функция перехода состояния
 
-        Args:
-            state: текущее состояние
-            stage_idx: индекс текущего этапа (0-based)
+        Сначала прямым проходом перечисляются достижимые состояния каждого
+        этапа, затем V_t вычисляется от последнего этапа к первому по таблице
+        V_{t+1} ядром этапа (stage_kernel_nb). На последнем этапе V_T вычисляется прямо по
+        состояниям сценариев, без перечисления терминальных состояний.
 
         Returns:
-            Максимальное ожидаемое значение функции ценности
+            Кортеж (максимальный ожидаемый доход, стратегия по этапам: коды
+            оптимальных действий, см. decode_action)
         """
-        # Проверка кэша
-        cache_key = (stage_idx, state)
-        if cache_key in self.cache:
-            return self.cache[cache_key][0]
-
-        # Если это последний этап, возвращаем терминальное значение
-        if stage_idx >= len(self.stages):
-            value = self._terminal_value(state)
-            self.cache[cache_key] = (value, None)
-            return value
-
-        stage = self.stages[stage_idx]
-        best_value = float('-inf')
-        best_action: Optional[Action] = None
-
-        # Генерируем все допустимые действия
-        actions = self._generate_actions(state)
-
-        # Если нет допустимых действий, возвращаем терминальное значение
-        if not actions:
-            value = self._terminal_value(state)
-            self.cache[cache_key] = (value, None)
-            return value
-
-        # Для каждого действия вычисляем ожидаемое значение
-        for action in actions:
-            # Применяем действие
-            state_after_action = self._apply_action(state, action)
-            if state_after_action is None:
-                continue
-
-            # Вычисляем ожидаемое значение по всем сценариям
-            expected_value = 0.0
-
-            for scenario in stage.scenarios:
-                # Применяем сценарий к состоянию после действия
-                state_after_scenario = self._apply_scenario(state_after_action, scenario)
-
-                # Рекурсивно вычисляем значение для следующего этапа
-                future_value = self._bellman_recursive(state_after_scenario, stage_idx + 1)
-
-                # Добавляем вклад сценария (с учетом вероятности)
-                expected_value += scenario.probability * future_value
-
-            # Обновляем лучшее значение и действие
-            if expected_value > best_value:
-                best_value = expected_value
-                best_action = action
-
-        # Сохраняем в кэш
-        self.cache[cache_key] = (best_value, best_action)
-        if best_action is not None:
-            self.optimal_strategy[cache_key] = best_action
+        # Новые таблицы для каждого этапа
+        num_stages = len(self.stages)
+        self.cache = [TypedDict.empty(key_type=TABLE_KEY, value_type=VALUE_TYPE)
+                      for _ in range(num_stages + 1)]
+        self.optimal_strategy = [TypedDict.empty(key_type=TABLE_KEY, value_type=types.int64)
+                                 for _ in range(num_stages)]
+        self.next_states = [TypedDict.empty(key_type=TABLE_KEY, value_type=TABLE_KEY)
+                            for _ in range(num_stages)]
+
+        layers = self._reachable_states()
+
+        # Обратный ход: все состояния этапа обрабатываются одним вызовом ядра
+        # этапа, значения V_{t+1} читаются из таблицы следующего этапа (на
+        # последнем этапе - терминальное значение). Состояния этапа
+        # освобождаются сразу после его обработки
+        for stage_idx in reversed(range(num_stages)):
+            grid_states = np.array(layers.pop(), dtype=np.int64).reshape(-1, 4)
+            growth, slack = self._stage_bounds[stage_idx]
+            best_values, best_codes, best_next = stage_kernel_nb(
+                grid_states, self.cache[stage_idx + 1], stage_idx + 1 == num_stages,
+                self._stage_probs[stage_idx], self._stage_mults[stage_idx], growth, slack,
+                self._action_grid, self._asset_deltas, self._cash_deltas, self._thresholds)
+            store_stage_nb(self.cache[stage_idx], self.optimal_strategy[stage_idx], self.next_states[stage_idx],
+                           grid_states, best_values, best_codes, best_next)
+
+        initial_state = self._quantize(self.initial_state)
+        if num_stages:
+            _, max_expected_value, _, _ = path_step_nb(self.cache[0], self.optimal_strategy[0],
+                                                       self.next_states[0], initial_state)
+        else:
+            max_expected_value = self._terminal_value(self._snap(initial_state))
+
+        # Формируем стратегию по этапам: один проход по таблице решений каждого этапа
+        strategy_by_stage: Dict[int, Dict[PortfolioState, int]] = {}
+        for stage_idx, strategy in enumerate(self.optimal_strategy):
+            grid_states, codes = table_items_nb(strategy)
+            strategy_by_stage[stage_idx] = {
+                self._snap(grid_state): action
+                for grid_state, action in zip(map(tuple, grid_states.tolist()), codes.tolist())
+            }
 
-        return best_value
+        return max_expected_value, strategy_by_stage
 
     def get_optimal_path(self, state: PortfolioState, stage_idx: int = 0) -> List[DecisionNode]:
         """
@@ -333,32 +621,23 @@ class InvestmentSolver:
             Список узлов решений (состояние, действие, ожидаемое значение)
         """
         path = []
-        current_state = state
-        current_stage = stage_idx
-
-        while current_stage < len(self.stages):
-            cache_key = (current_stage, current_state)
-            if cache_key not in self.cache:
-                break
-
-            expected_value, action = self.cache[cache_key]
-            path.append(DecisionNode(current_state, action, expected_value, current_stage))
-
-            if action is None:
+        grid_state = self._quantize(state)
+
+        # Переходы между этапами уже записаны в next_states при решении:
+        # путь строится по первому сценарию каждого этапа (для демонстрации,
+        # в реальности путь зависит от реализовавшегося сценария)
+        for current_stage in range(stage_idx, len(self.optimal_strategy)):
+            found, expected_value, action, next_state = path_step_nb(
+                self.cache[current_stage], self.optimal_strategy[current_stage],
+                self.next_states[current_stage], grid_state)
+            if not found:
                 break
 
-            # Применяем действие
-            state_after_action = self._apply_action(current_state, action)
-            if state_after_action is None:
-                break
+            path.append(DecisionNode(self._snap(grid_state), action if action >= 0 else None,
+                                     expected_value, current_stage))
 
-            # Применяем первый сценарий для демонстрации (можно выбрать любой)
-            # В реальности путь зависит от реализовавшегося сценария
-            if current_stage < len(self.stages):
-                scenario = self.stages[current_stage].scenarios[0]  # Берем первый сценарий
-                current_state = self._apply_scenario(state_after_action, scenario)
-                current_stage += 1
-            else:
+            if action < 0:
                 break
+            grid_state = next_state
 
         return path